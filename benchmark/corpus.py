@@ -0,0 +1,108 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+import random
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Generator, List, Tuple
+
+    from rdflib.term import Node
+
+from rdflib import RDF, XSD, BNode, Literal, Namespace, URIRef
+
+DATACITE = Namespace("http://purl.org/spar/datacite/")
+DCTERMS = Namespace("http://purl.org/dc/terms/")
+FABIO = Namespace("http://purl.org/spar/fabio/")
+FOAF = Namespace("http://xmlns.com/foaf/0.1/")
+FRBR = Namespace("http://purl.org/vocab/frbr/core#")
+LITERAL = Namespace("http://www.essepuntato.it/2010/06/literalreification/")
+PRISM = Namespace("http://prismstandard.org/namespaces/basic/2.0/")
+PRO = Namespace("http://purl.org/spar/pro/")
+
+BASE_IRI = "https://w3id.org/oc/meta/"
+SUPPLIER_PREFIX = "060"
+
+
+def get_entity_iri(short_name: str, number: int) -> URIRef:
+    return URIRef(f"{BASE_IRI}{short_name}/{SUPPLIER_PREFIX}{number}")
+
+
+def get_graph_iri(short_name: str) -> URIRef:
+    return URIRef(f"{BASE_IRI}{short_name}/")
+
+
+def generate_corpus(num_of_entities: int, named_graphs: bool = True, blank_nodes: bool = False, seed: int = 0) -> Generator[Tuple[Node, Node, Node, URIRef], None, None]:
+    # Each bibliographic resource comes with one or two identifiers and one to six authors.
+    # Authors are agent roles held by responsible agents. A fifth of the roles are held
+    # by an agent already seen in the corpus, as happens with prolific authors
+    rnd = random.Random(seed)
+    counters = {'br': 0, 'id': 0, 'ar': 0, 'ra': 0}
+    agents: List[URIRef] = []
+
+    def new_entity(short_name: str) -> URIRef:
+        counters[short_name] += 1
+        return get_entity_iri(short_name, counters[short_name])
+
+    def quad(s: Node, p: Node, o: Node, short_name: str) -> Tuple[Node, Node, Node, URIRef]:
+        return s, p, o, get_graph_iri(short_name) if named_graphs else None
+
+    def new_identifier(scheme: URIRef, value: str) -> Generator[Tuple[Node, Node, Node, URIRef], None, None]:
+        identifier = new_entity('id')
+        yield quad(identifier, RDF.type, DATACITE.Identifier, 'id')
+        yield quad(identifier, DATACITE.usesIdentifierScheme, scheme, 'id')
+        yield quad(identifier, LITERAL.hasLiteralValue, Literal(value, datatype=XSD.string), 'id')
+        return identifier
+
+    while sum(counters.values()) < num_of_entities:
+        br = new_entity('br')
+        yield quad(br, RDF.type, FABIO.Expression, 'br')
+        yield quad(br, RDF.type, FABIO.JournalArticle, 'br')
+        yield quad(br, DCTERMS.title, Literal(f"Title of the article number {counters['br']}"), 'br')
+        yield quad(br, PRISM.publicationDate, Literal(f"{rnd.randint(1950, 2023)}-{rnd.randint(1, 12):02d}", datatype=XSD.gYearMonth), 'br')
+        doi = yield from new_identifier(DATACITE.doi, f"10.{rnd.randint(1000, 9999)}/{counters['br']}")
+        yield quad(br, DATACITE.hasIdentifier, doi, 'br')
+        if rnd.random() < 0.3:
+            pmid = yield from new_identifier(DATACITE.pmid, str(counters['br']))
+            yield quad(br, DATACITE.hasIdentifier, pmid, 'br')
+        if blank_nodes:
+            embodiment = BNode(f"embodiment{counters['br']}")
+            yield quad(br, FRBR.embodiment, embodiment, 'br')
+            yield quad(embodiment, PRISM.startingPage, Literal(str(rnd.randint(1, 500))), 'br')
+        for _ in range(rnd.randint(1, 6)):
+            ar = new_entity('ar')
+            yield quad(ar, RDF.type, PRO.RoleInTime, 'ar')
+            yield quad(ar, PRO.withRole, PRO.author, 'ar')
+            if agents and rnd.random() < 0.2:
+                ra = rnd.choice(agents)
+            else:
+                ra = new_entity('ra')
+                agents.append(ra)
+                yield quad(ra, RDF.type, FOAF.Agent, 'ra')
+                yield quad(ra, FOAF.familyName, Literal(f"Surname {counters['ra']}"), 'ra')
+                yield quad(ra, FOAF.givenName, Literal(f"Name {counters['ra']}"), 'ra')
+                if rnd.random() < 0.5:
+                    orcid = yield from new_identifier(DATACITE.orcid, f"0000-0000-{counters['ra']:09d}")
+                    yield quad(ra, DATACITE.hasIdentifier, orcid, 'ra')
+            yield quad(ar, PRO.isHeldBy, ra, 'ar')
+            yield quad(br, PRO.isDocumentContextFor, ar, 'br')
+
+
+def get_entities(short_name: str, graph) -> List[URIRef]:
+    prefix = f"{BASE_IRI}{short_name}/"
+    return [subject for subject in graph.subjects(unique=True) if isinstance(subject, URIRef) and subject.startswith(prefix)]
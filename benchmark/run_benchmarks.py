@@ -0,0 +1,224 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Optional
+
+import rdflib
+from rdflib import Graph, Literal
+
+from benchmark.corpus import DCTERMS, generate_corpus, get_entities, get_graph_iri
+from counter_handler.dbm_counter_handler import DbmCounterHandler
+from counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from counter_handler.leasing_counter_handler import LeasingCounterHandler
+from counter_handler.sharded_filesystem_counter_handler import ShardedFilesystemCounterHandler
+from counter_handler.sqlite_counter_handler import SqliteCounterHandler
+from ocdm_graph import OCDMConjunctiveGraph, OCDMGraph
+from query_utils import get_update_query
+
+DEFAULT_SIZES: List[int] = [10**3, 10**4, 10**5, 10**6]
+COUNTER_HANDLERS: Dict[str, Callable[[str], Any]] = {
+    'in-memory': lambda tmp_dir: InMemoryCounterHandler(),
+    'filesystem': lambda tmp_dir: FilesystemCounterHandler(os.path.join(tmp_dir, 'info_dir'), write_back=True),
+    'sqlite': lambda tmp_dir: SqliteCounterHandler(os.path.join(tmp_dir, 'counters.db')),
+    'sharded-filesystem': lambda tmp_dir: ShardedFilesystemCounterHandler(os.path.join(tmp_dir, 'shards'), write_back=True),
+    'leasing-sqlite': lambda tmp_dir: LeasingCounterHandler(os.path.join(tmp_dir, 'leasing.db'), lease_size=100),
+    'dbm': lambda tmp_dir: DbmCounterHandler(os.path.join(tmp_dir, 'dbm', 'counters'), base_iri='https://w3id.org/oc/meta')
+}
+
+
+class Measurement(object):
+    def __init__(self, measure_memory: bool = False):
+        self.measure_memory = measure_memory
+        self.seconds: Optional[float] = None
+        self.peak_memory: Optional[int] = None
+
+    def __enter__(self) -> Measurement:
+        gc.collect()
+        if self.measure_memory:
+            tracemalloc.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.seconds = time.perf_counter() - self._start
+        if self.measure_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def run_benchmarks(sizes: List[int], named_graphs: bool = True, blank_nodes: bool = False, change_ratio: float = 0.01, measure_memory: bool = False, counter_handlers: List[str] = None, store: str = 'default', processes: int = None) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+
+    def record(size: int, benchmark: str, measurement: Measurement, **extra) -> None:
+        result = {'size': size, 'benchmark': benchmark, 'seconds': round(measurement.seconds, 6), 'peak_memory': measurement.peak_memory}
+        result.update(extra)
+        results.append(result)
+        print(f"{size:>9} {benchmark:<50} {measurement.seconds:>10.3f}s", file=sys.stderr)
+
+    for size in sizes:
+        ocdm_graph = OCDMConjunctiveGraph(store=store) if named_graphs else OCDMGraph(store=store)
+        with Measurement(measure_memory) as measurement:
+            if named_graphs:
+                contexts = dict()
+                quads = []
+                for s, p, o, graph_iri in generate_corpus(size, named_graphs, blank_nodes):
+                    if graph_iri not in contexts:
+                        contexts[graph_iri] = ocdm_graph.get_context(graph_iri)
+                    quads.append((s, p, o, contexts[graph_iri]))
+                ocdm_graph.addN(quads)
+            else:
+                for s, p, o, _ in generate_corpus(size, named_graphs, blank_nodes):
+                    ocdm_graph.add((s, p, o))
+        record(size, 'load', measurement, statements=len(ocdm_graph))
+
+        with Measurement(measure_memory) as measurement:
+            ocdm_graph.preexisting_finished(resp_agent='https://orcid.org/0000-0002-8420-0696', c_time=0)
+        record(size, 'preexisting_finished', measurement)
+
+        # A fraction of the resources is modified and the same fraction of agents is merged
+        brs = get_entities('br', ocdm_graph)
+        ras = get_entities('ra', ocdm_graph)
+        modified = brs[:max(1, int(len(brs) * change_ratio))]
+        num_of_merges = max(1, int(len(ras) * change_ratio))
+        pairs = [(ras[i], ras[i + num_of_merges]) for i in range(num_of_merges) if i + num_of_merges < len(ras)]
+        with Measurement(measure_memory) as measurement:
+            for br in modified:
+                ocdm_graph.remove((br, DCTERMS.title, None))
+                ocdm_graph.add((br, DCTERMS.title, Literal(f"Corrected title of {br}")) + ((get_graph_iri('br'),) if named_graphs else ()))
+        record(size, 'modify', measurement, entities=len(modified))
+        with Measurement(measure_memory) as measurement:
+            ocdm_graph.merge_many(pairs)
+        record(size, 'merge', measurement, entities=len(pairs))
+
+        dirty_subjects = ocdm_graph.get_dirty_subjects()
+        with Measurement(measure_memory) as measurement:
+            for subject in dirty_subjects:
+                preexisting_graph = Graph()
+                current_graph = Graph()
+                for statement in ocdm_graph.get_preexisting_statements(subject):
+                    preexisting_graph.add(statement[:3])
+                for statement in ocdm_graph.get_current_statements(subject):
+                    current_graph.add(statement[:3])
+                get_update_query(preexisting_graph, current_graph)
+        record(size, 'get_update_query', measurement, entities=len(dirty_subjects))
+
+        with Measurement(measure_memory) as measurement:
+            ocdm_graph.generate_provenance(c_time=0)
+        record(size, 'generate_provenance', measurement, snapshots=len(ocdm_graph.provenance.res_to_entity))
+        if processes is not None:
+            # The same changes are recorded again, with new snapshot numbers, by a pool of workers
+            ocdm_graph.provenance.res_to_entity.clear()
+            with Measurement(measure_memory) as measurement:
+                ocdm_graph.generate_provenance(c_time=0, processes=processes)
+            record(size, f'generate_provenance[processes={processes}]', measurement, snapshots=len(ocdm_graph.provenance.res_to_entity))
+
+        entity_names = [str(subject) for subject in ocdm_graph.subjects(unique=True)]
+        del ocdm_graph, brs, ras, modified, pairs, dirty_subjects
+        for name in counter_handlers if counter_handlers is not None else COUNTER_HANDLERS:
+            tmp_dir = tempfile.mkdtemp()
+            try:
+                counter_handler = COUNTER_HANDLERS[name](tmp_dir)
+                with Measurement(measure_memory) as measurement:
+                    with counter_handler.batch():
+                        counter_handler.increment_counters(entity_names)
+                    counter_handler.flush()
+                record(size, f'counter_handler[{name}].increment_counters', measurement, entities=len(entity_names))
+                with Measurement(measure_memory) as measurement:
+                    counter_handler.read_counters(entity_names)
+                record(size, f'counter_handler[{name}].read_counters', measurement, entities=len(entity_names))
+                single = entity_names[:1000]
+                with Measurement(measure_memory) as measurement:
+                    for entity_name in single:
+                        counter_handler.increment_counter(entity_name)
+                    counter_handler.flush()
+                record(size, f'counter_handler[{name}].increment_counter', measurement, entities=len(single))
+                if hasattr(counter_handler, 'close'):
+                    counter_handler.close()
+            finally:
+                shutil.rmtree(tmp_dir)
+    return results
+
+
+def get_metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat(sep="T"),
+        'python': platform.python_version(),
+        'rdflib': rdflib.__version__,
+        'platform': platform.platform()
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    baseline_results = {(result['size'], result['benchmark']): result for result in baseline['results']}
+    comparison: List[Dict[str, Any]] = []
+    for result in current['results']:
+        old_result = baseline_results.get((result['size'], result['benchmark']))
+        if old_result is None or not old_result['seconds']:
+            continue
+        comparison.append({'size': result['size'], 'benchmark': result['benchmark'], 'baseline_seconds': old_result['seconds'], 'seconds': result['seconds'], 'ratio': round(result['seconds'] / old_result['seconds'], 3)})
+    return comparison
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark rdflib-ocdm on synthetic OCDM corpora')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='The numbers of entities of the corpora')
+    parser.add_argument('--no-named-graphs', action='store_true', help='Use an OCDMGraph instead of an OCDMConjunctiveGraph')
+    parser.add_argument('--blank-nodes', action='store_true', help='Add blank nodes to the corpora')
+    parser.add_argument('--change-ratio', type=float, default=0.01, help='The fraction of entities modified and merged')
+    parser.add_argument('--memory', action='store_true', help='Measure the peak memory of every benchmark (slower)')
+    parser.add_argument('--store', default='default', help="The rdflib store of the graphs, e.g. 'Dictionary' (defaults to the in-memory store of rdflib)")
+    parser.add_argument('--processes', type=int, help='Also measure generate_provenance with this number of worker processes')
+    parser.add_argument('--counter-handlers', nargs='+', choices=list(COUNTER_HANDLERS), help='The counter handlers to be measured')
+    parser.add_argument('--output', help='The JSON file where results are stored (defaults to stdout)')
+    parser.add_argument('--compare', help='A JSON file of earlier results to compare with')
+    args = parser.parse_args(argv)
+    results = run_benchmarks(args.sizes, not args.no_named_graphs, args.blank_nodes, args.change_ratio, args.memory, args.counter_handlers, args.store, args.processes)
+    report = {'metadata': get_metadata(), 'parameters': {key: value for key, value in vars(args).items() if key not in {'output', 'compare'}}, 'results': results}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf8') as f:
+            report['comparison'] = compare_results(json.load(f), report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
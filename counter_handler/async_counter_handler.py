@@ -0,0 +1,214 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import asyncio
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from typing import Any, AsyncGenerator, Callable, Dict, Iterable, Optional
+
+    from counter_handler.counter_handler import CounterHandler
+
+
+class AsyncCounterHandler(ABC):
+    """Abstract class representing the interface for every concrete counter handler
+    that can be awaited from an asyncio event loop."""
+
+    @abstractmethod
+    async def set_counter(self, new_value: int, entity_name: str) -> None:
+        """
+        Method signature for concrete implementations that allow setting the counter value
+        of provenance entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_name: The entity name
+        :type entity_name: str
+        :raises NotImplementedError: always
+        :return: None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_counter(self, entity_name: str) -> int:
+        """
+        Method signature for concrete implementations that allow reading the counter value
+        of graph and provenance entities.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :raises NotImplementedError: always
+        :return: The requested counter value.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def increment_counter(self, entity_name: str) -> int:
+        """
+        Method signature for concrete implementations that allow incrementing by one unit
+        the counter value of graph and provenance entities.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :raises NotImplementedError: always
+        :return: The newly-updated (already incremented) counter value.
+        """
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        """
+        It persists any counter value that is still buffered in memory.
+
+        :return: None
+        """
+        pass
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncGenerator[AsyncCounterHandler, None]:
+        """
+        It groups the counter operations awaited within an ``async with`` block, so that concrete
+        implementations backed by a transactional storage can commit them at once.
+        By default, operations are not grouped at all.
+
+        :return: An asynchronous context manager yielding this counter handler
+        """
+        yield self
+
+    async def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows setting the counter values of many provenance entities at once.
+        By default, the single-entity operations are awaited concurrently.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :return: None
+        """
+        await asyncio.gather(*(self.set_counter(new_value, entity_name) for entity_name, new_value in new_values.items()))
+
+    async def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows reading the counter values of many graph and provenance entities at once.
+        By default, the single-entity operations are awaited concurrently.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name, as a string, to its counter value.
+        """
+        entity_names = [str(entity_name) for entity_name in dict.fromkeys(entity_names)]
+        values = await asyncio.gather(*(self.read_counter(entity_name) for entity_name in entity_names))
+        return dict(zip(entity_names, values))
+
+    async def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows incrementing by one unit the counter values of many graph and provenance
+        entities at once. By default, the single-entity operations are awaited concurrently.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name, as a string, to its newly-updated
+          (already incremented) counter value.
+        """
+        entity_names = [str(entity_name) for entity_name in entity_names]
+        values = await asyncio.gather(*(self.increment_counter(entity_name) for entity_name in entity_names))
+        return dict(zip(entity_names, values))
+
+
+class ExecutorCounterHandler(AsyncCounterHandler):
+    """An ``AsyncCounterHandler`` that runs the operations of a synchronous ``CounterHandler``
+    in an executor, so that they never block the event loop.
+
+    By default, the executor has a single thread, hence the wrapped handler is never used by
+    two operations at once, as long as it is not used directly while they are pending.
+    Bulk operations are forwarded to the bulk methods of the wrapped handler, within a batch."""
+
+    def __init__(self, counter_handler: CounterHandler, executor: Executor = None) -> None:
+        """
+        Constructor of the ``ExecutorCounterHandler`` class.
+
+        :param counter_handler: The synchronous counter handler to be wrapped
+        :type counter_handler: CounterHandler
+        :param executor: The executor running the operations (defaults to a new single-thread executor)
+        :type executor: Executor, optional
+        """
+        self.counter_handler: CounterHandler = counter_handler
+        self._owns_executor: bool = executor is None
+        self.executor: Executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+
+    async def set_counter(self, new_value: int, entity_name: str) -> None:
+        await self._run(self.counter_handler.set_counter, new_value, entity_name)
+
+    async def read_counter(self, entity_name: str) -> int:
+        return await self._run(self.counter_handler.read_counter, entity_name)
+
+    async def increment_counter(self, entity_name: str) -> int:
+        return await self._run(self.counter_handler.increment_counter, entity_name)
+
+    async def flush(self) -> None:
+        await self._run(self.counter_handler.flush)
+
+    async def set_counters(self, new_values: Dict[str, int]) -> None:
+        await self._run(self._in_batch, self.counter_handler.set_counters, dict(new_values))
+
+    async def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        return await self._run(self.counter_handler.read_counters, list(entity_names))
+
+    async def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        return await self._run(self._in_batch, self.counter_handler.increment_counters, list(entity_names))
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncGenerator[ExecutorCounterHandler, None]:
+        """
+        It opens a ``batch`` block of the wrapped handler, which is entered and exited in the executor.
+
+        :return: An asynchronous context manager yielding this adapter
+        """
+        batch = self.counter_handler.batch()
+        await self._run(batch.__enter__)
+        try:
+            yield self
+        except BaseException:
+            await self._run(batch.__exit__, *sys.exc_info())
+            raise
+        await self._run(batch.__exit__, None, None, None)
+
+    def close(self) -> None:
+        """
+        It shuts down the executor, if it was created by this adapter.
+
+        :return: None
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> ExecutorCounterHandler:
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.flush()
+        self.close()
+
+    def _in_batch(self, function: Callable, argument: Any) -> Any:
+        with self.counter_handler.batch():
+            return function(argument)
+
+    async def _run(self, function: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
@@ -13,7 +13,14 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Generator, Iterable
 
 
 class CounterHandler(ABC):
@@ -58,4 +65,67 @@ class CounterHandler(ABC):
         :raises NotImplementedError: always
         :return: The newly-updated (already incremented) counter value.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """
+        It persists any counter value that is still buffered in memory. Concrete implementations
+        that buffer their writes should override this method.
+
+        :return: None
+        """
+        pass
+
+    @contextmanager
+    def batch(self) -> Generator[CounterHandler, None, None]:
+        """
+        It groups the counter operations performed within a ``with`` block, so that concrete
+        implementations backed by a transactional storage can commit them at once.
+        By default, operations are not grouped at all.
+
+        :return: A context manager yielding this counter handler
+        """
+        yield self
+
+    def __enter__(self) -> CounterHandler:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.flush()
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows setting the counter values of many provenance entities at once.
+        Concrete implementations should override this method to perform a single round trip.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        for entity_name, new_value in new_values.items():
+            self.set_counter(new_value, entity_name)
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows reading the counter values of many graph and provenance entities at once.
+        Concrete implementations should override this method to perform a single round trip.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name, as a string, to its counter value.
+        """
+        return {str(entity_name): self.read_counter(entity_name) for entity_name in entity_names}
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows incrementing by one unit the counter values of many graph and provenance
+        entities at once. Concrete implementations should override this method to perform
+        a single round trip.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name, as a string, to its newly-updated
+          (already incremented) counter value.
+        """
+        return {str(entity_name): self.increment_counter(entity_name) for entity_name in entity_names}
@@ -0,0 +1,263 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2023, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import dbm
+import os
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Generator, Iterable, List, Optional, Tuple
+
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
+
+from counter_handler.counter_handler import CounterHandler
+from support import is_string_empty
+
+
+class DbmCounterHandler(CounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that persistently stores
+    the counter values within an embedded key-value database of the ``dbm`` family.
+
+    Entity names starting with ``base_iri`` are stored under the remaining part of the IRI
+    (e.g. ``br/0605``), while any other entity name is stored as ``<`` followed by the whole IRI,
+    which cannot clash since IRIs never contain ``<``. Changes are synchronized to disk by ``flush``,
+    when a ``batch`` or ``with`` block exits, and when the database is closed."""
+
+    def __init__(self, database: str, base_iri: str = None) -> None:
+        """
+        Constructor of the ``DbmCounterHandler`` class.
+
+        :param database: The path to the database
+        :type database: str
+        :param base_iri: The base IRI stripped from the entity names to build the keys (defaults to None)
+        :type base_iri: str, optional
+        :raises ValueError: if ``database`` is None or an empty string.
+        """
+        if database is None or is_string_empty(database):
+            raise ValueError("database parameter is required!")
+        if base_iri is not None and base_iri[-1] != '/':
+            base_iri += '/'
+        self.database: str = database
+        self.base_iri: Optional[str] = base_iri
+        self._batch_depth: int = 0
+        self._open()
+
+    @contextmanager
+    def batch(self) -> Generator[DbmCounterHandler, None, None]:
+        """
+        It defers the synchronization to disk of the operations performed within a ``with``
+        block until the outermost block exits.
+
+        :return: A context manager yielding this counter handler
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.flush()
+
+    def set_counter(self, new_value: int, entity_name: str) -> None:
+        """
+        It allows to set the counter value of provenance entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_name: The entity name
+        :type entity_name: str
+        :raises ValueError: if ``new_value`` is a negative integer.
+        :return: None
+        """
+        self.set_counters({entity_name: new_value})
+
+    def read_counter(self, entity_name: str) -> int:
+        """
+        It allows to read the counter value of provenance entities.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :return: The requested counter value.
+        """
+        value: Optional[bytes] = self._get_values([self._get_key(str(entity_name))])[0]
+        return int(value) if value is not None else 0
+
+    def increment_counter(self, entity_name: str) -> int:
+        """
+        It allows to increment the counter value of provenance entities by one unit.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :return: The newly-updated (already incremented) counter value.
+        """
+        entity_name = str(entity_name)
+        return self.increment_counters([entity_name])[entity_name]
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows to set the counter values of many provenance entities at once.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        if any(new_value < 0 for new_value in new_values.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        self._put_values([(self._get_key(str(entity_name)), str(new_value).encode('ascii')) for entity_name, new_value in new_values.items()])
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to read the counter values of many provenance entities at once.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its counter value.
+        """
+        entity_names = list(dict.fromkeys(str(entity_name) for entity_name in entity_names))
+        values = self._get_values([self._get_key(entity_name) for entity_name in entity_names])
+        return {entity_name: int(value) if value is not None else 0 for entity_name, value in zip(entity_names, values)}
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to increment the counter values of many provenance entities by one unit at once.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its newly-updated (already incremented) counter value.
+        """
+        entity_names = [str(entity_name) for entity_name in entity_names]
+        counters: Dict[str, int] = self.read_counters(entity_names)
+        for entity_name in entity_names:
+            counters[entity_name] += 1
+        self.set_counters(counters)
+        return counters
+
+    def flush(self) -> None:
+        """
+        It synchronizes the database to disk.
+
+        :return: None
+        """
+        if hasattr(self._db, 'sync'):
+            self._db.sync()
+
+    def close(self) -> None:
+        """
+        It synchronizes the database to disk and closes it.
+
+        :return: None
+        """
+        self.flush()
+        self._db.close()
+
+    def _get_key(self, entity_name: str) -> bytes:
+        if self.base_iri is not None and entity_name.startswith(self.base_iri):
+            return entity_name[len(self.base_iri):].encode('utf8')
+        return ('<' + entity_name).encode('utf8')
+
+    def _open(self) -> None:
+        directory: str = os.path.dirname(os.path.abspath(self.database))
+        os.makedirs(directory, exist_ok=True)
+        self._db = dbm.open(self.database, 'c')
+
+    def _get_values(self, keys: List[bytes]) -> List[Optional[bytes]]:
+        return [self._db.get(key) for key in keys]
+
+    def _put_values(self, items: List[Tuple[bytes, bytes]]) -> None:
+        for key, value in items:
+            self._db[key] = value
+
+
+class LmdbCounterHandler(DbmCounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that persistently stores
+    the counter values within an LMDB environment. It requires the optional ``lmdb`` package.
+
+    Keys are built as in ``DbmCounterHandler``. The operations performed within a ``batch``
+    block share a single write transaction, committed when the block exits."""
+
+    def __init__(self, database: str, base_iri: str = None, map_size: int = 2 ** 30) -> None:
+        """
+        Constructor of the ``LmdbCounterHandler`` class.
+
+        :param database: The path to the LMDB environment
+        :type database: str
+        :param base_iri: The base IRI stripped from the entity names to build the keys (defaults to None)
+        :type base_iri: str, optional
+        :param map_size: The maximum size of the environment, in bytes (defaults to 1 GiB)
+        :type map_size: int, optional
+        :raises ImportError: if the ``lmdb`` package is not installed.
+        """
+        if lmdb is None:
+            raise ImportError("LmdbCounterHandler requires the lmdb package")
+        self.map_size: int = map_size
+        self._txn = None
+        super(LmdbCounterHandler, self).__init__(database, base_iri)
+
+    @contextmanager
+    def batch(self) -> Generator[LmdbCounterHandler, None, None]:
+        """
+        It opens a write transaction that is committed when the outermost ``batch`` block exits,
+        or aborted if an exception is raised within it.
+
+        :return: A context manager yielding this counter handler
+        """
+        if self._batch_depth == 0:
+            self._txn = self._db.begin(write=True)
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._txn.abort()
+                self._txn = None
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self._txn.commit()
+            self._txn = None
+
+    def flush(self) -> None:
+        """
+        It synchronizes the environment to disk.
+
+        :return: None
+        """
+        self._db.sync(True)
+
+    def _open(self) -> None:
+        self._db = lmdb.open(self.database, map_size=self.map_size)
+
+    def _get_values(self, keys: List[bytes]) -> List[Optional[bytes]]:
+        if self._txn is not None:
+            return [self._txn.get(key) for key in keys]
+        with self._db.begin() as txn:
+            return [txn.get(key) for key in keys]
+
+    def _put_values(self, items: List[Tuple[bytes, bytes]]) -> None:
+        if self._txn is not None:
+            for key, value in items:
+                self._txn.put(key, value)
+            return
+        with self._db.begin(write=True) as txn:
+            for key, value in items:
+                txn.put(key, value)
@@ -17,21 +17,35 @@ from __future__ import annotations
 
 import json
 import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, Optional, Set
 
 from counter_handler.counter_handler import CounterHandler
-from support import is_string_empty
+from support import is_string_empty, write_file_atomically
 
 
 class FilesystemCounterHandler(CounterHandler):
     """A concrete implementation of the ``CounterHandler`` interface that persistently stores
-    the counter values within the filesystem."""
+    the counter values within the filesystem.
+
+    By default, every operation reads the index file and every change rewrites it. In write-back
+    mode, the index file is loaded once and counters are served from memory: changes are written
+    only by ``flush``, when exiting a ``with`` block, or when the number of changed counters reaches
+    ``flush_threshold``. Every write replaces the index file atomically."""
 
-    def __init__(self, info_dir: str) -> None:
+    def __init__(self, info_dir: str, write_back: bool = False, flush_threshold: int = None) -> None:
         """
         Constructor of the ``FilesystemCounterHandler`` class.
 
         :param info_dir: The path to the folder that does/will contain the counter values.
         :type info_dir: str
+        :param write_back: Whether to keep the counters in memory until they are flushed (defaults to False)
+        :type write_back: bool, optional
+        :param flush_threshold: In write-back mode, the number of changed counters that triggers a flush
+          (defaults to None, i.e. counters are written only when explicitly flushed)
+        :type flush_threshold: int, optional
         :raises ValueError: if ``info_dir`` is None or an empty string.
         """
         if info_dir is None or is_string_empty(info_dir):
@@ -43,6 +57,10 @@ class FilesystemCounterHandler(CounterHandler):
         self.info_dir: str = info_dir
         self.prov_files = dict()
         self.provenance_index_filename = 'provenance_index.json'
+        self.write_back: bool = write_back
+        self.flush_threshold: Optional[int] = flush_threshold
+        self._index: Optional[Dict[str, int]] = None
+        self._dirty_entities: Set[str] = set()
 
     def set_counter(self, new_value: int, entity_name: str) -> None:
         """
@@ -58,13 +76,9 @@ class FilesystemCounterHandler(CounterHandler):
         entity_name = str(entity_name)
         if new_value < 0:
             raise ValueError("new_value must be a non negative integer!")
-        file_path: str = self._get_prov_path()
-        self.__initialize_file_if_not_existing(file_path, entity_name)
-        with open(file_path, 'r', encoding='utf8') as file:
-            data = json.load(file)
-        with open(file_path, 'w', encoding='utf8') as outfile:
-            data[entity_name] = new_value
-            outfile.write(data)
+        data = self._get_index()
+        data[entity_name] = new_value
+        self._store_index(data, [entity_name])
 
     def read_counter(self, entity_name: str) -> int:
         """
@@ -75,8 +89,8 @@ class FilesystemCounterHandler(CounterHandler):
         :return: The requested counter value.
         """
         entity_name = str(entity_name)
-        file_path: str = self._get_prov_path()
-        return self._read_number(file_path, entity_name)
+        self.prov_files[entity_name] = self._get_index().get(entity_name, 0)
+        return self.prov_files[entity_name]
 
     def increment_counter(self, entity_name: str) -> int:
         """
@@ -87,39 +101,96 @@ class FilesystemCounterHandler(CounterHandler):
         :return: The newly-updated (already incremented) counter value.
         """
         entity_name = str(entity_name)
-        file_path: str = self._get_prov_path()
-        return self._add_number(file_path, entity_name)
+        data = self._get_index()
+        data[entity_name] = data.get(entity_name, 0) + 1
+        self._store_index(data, [entity_name])
+        self.prov_files[entity_name] = data[entity_name]
+        return data[entity_name]
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows to set the counter values of many provenance entities, rewriting the
+        index file only once.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        new_values = {str(entity_name): new_value for entity_name, new_value in new_values.items()}
+        if any(new_value < 0 for new_value in new_values.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        data = self._get_index()
+        data.update(new_values)
+        self._store_index(data, new_values)
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to read the counter values of many provenance entities, reading the
+        index file only once.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its counter value.
+        """
+        data = self._get_index()
+        counters: Dict[str, int] = {str(entity_name): data.get(str(entity_name), 0) for entity_name in entity_names}
+        self.prov_files.update(counters)
+        return counters
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to increment the counter values of many provenance entities by one unit,
+        reading and rewriting the index file only once.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its newly-updated (already incremented) counter value.
+        """
+        data = self._get_index()
+        counters: Dict[str, int] = dict()
+        for entity_name in entity_names:
+            entity_name = str(entity_name)
+            data[entity_name] = data.get(entity_name, 0) + 1
+            counters[entity_name] = data[entity_name]
+        self._store_index(data, counters)
+        self.prov_files.update(counters)
+        return counters
+
+    def flush(self) -> None:
+        """
+        It writes the counters changed since the last flush to the index file. It does nothing
+        unless the handler is in write-back mode.
+
+        :return: None
+        """
+        if self.write_back and self._dirty_entities:
+            self._dump_index(self._get_prov_path(), self._index)
+            self._dirty_entities.clear()
 
     def _get_prov_path(self) -> str:
         return os.path.join(self.info_dir, self.provenance_index_filename)
 
-    def __initialize_file_if_not_existing(self, file_path: str, entity_name: str):
-        entity_name = str(entity_name)
-        if not os.path.exists(os.path.dirname(file_path)):
-            os.makedirs(os.path.dirname(file_path))
+    def _get_index(self) -> Dict[str, int]:
+        if not self.write_back:
+            return self._load_index(self._get_prov_path())
+        if self._index is None:
+            self._index = self._load_index(self._get_prov_path())
+        return self._index
+
+    def _store_index(self, data: Dict[str, int], entity_names: Iterable[str]) -> None:
+        if not self.write_back:
+            self._dump_index(self._get_prov_path(), data)
+            return
+        self._dirty_entities.update(entity_names)
+        if self.flush_threshold is not None and len(self._dirty_entities) >= self.flush_threshold:
+            self.flush()
+
+    def _load_index(self, file_path: str) -> Dict[str, int]:
         if not os.path.isfile(file_path):
-            with open(file_path, 'w', encoding='utf8') as outfile:
-                json_object = json.dumps({entity_name: 0}, ensure_ascii=False, indent=None)
-                outfile.write(json_object)
-
-    def _read_number(self, file_path: str, entity_name: str) -> int:
-        self.__initialize_file_if_not_existing(file_path, entity_name)
+            return dict()
         with open(file_path, 'r', encoding='utf8') as file:
-            data = json.load(file)
-            if entity_name in data:
-                self.prov_files[entity_name] = data[entity_name]
-            else:
-                self.prov_files[entity_name] = 0
-        return self.prov_files[entity_name]
+            return json.load(file)
 
-    def _add_number(self, file_path: str, entity_name: str) -> int:
-        self.__initialize_file_if_not_existing(file_path, entity_name)
-        cur_number = self._read_number(file_path, entity_name)
-        cur_number += 1
-        with open(file_path, 'r', encoding='utf8') as file:
-            data = json.load(file)
-        with open(file_path, 'w', encoding='utf8') as outfile:
-            data[entity_name] = cur_number
-            json_object = json.dumps(data, ensure_ascii=False, indent=None)
-            outfile.write(json_object)
-        return cur_number
\ No newline at end of file
+    def _dump_index(self, file_path: str, data: Dict[str, int]) -> None:
+        write_file_atomically(file_path, json.dumps(data, ensure_ascii=False, indent=None))
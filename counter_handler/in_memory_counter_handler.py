@@ -19,7 +19,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import List, Dict
+    from typing import Dict, Iterable, List
 
 from counter_handler.counter_handler import CounterHandler
 
@@ -78,4 +78,47 @@ class InMemoryCounterHandler(CounterHandler):
             self.prov_counters[entity_name] += 1
         else:
             self.prov_counters[entity_name] = 1
-        return self.prov_counters[entity_name]
\ No newline at end of file
+        return self.prov_counters[entity_name]
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows to set the counter values of many provenance entities at once.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        new_values = {str(entity_name): new_value for entity_name, new_value in new_values.items()}
+        if any(new_value < 0 for new_value in new_values.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        self.prov_counters.update(new_values)
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to read the counter values of many provenance entities at once.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its counter value.
+        """
+        counters: Dict[str, int] = dict()
+        for entity_name in entity_names:
+            entity_name = str(entity_name)
+            counters[entity_name] = self.prov_counters.setdefault(entity_name, 0)
+        return counters
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to increment the counter values of many graph and provenance entities by one unit.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its newly-updated (already incremented) counter value.
+        """
+        counters: Dict[str, int] = dict()
+        for entity_name in entity_names:
+            entity_name = str(entity_name)
+            self.prov_counters[entity_name] = self.prov_counters.get(entity_name, 0) + 1
+            counters[entity_name] = self.prov_counters[entity_name]
+        return counters
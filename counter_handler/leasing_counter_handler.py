@@ -0,0 +1,314 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2023, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import os
+import uuid
+from collections import Counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Set
+
+from counter_handler.sqlite_counter_handler import SqliteCounterHandler
+
+
+class CounterLeaseError(Exception):
+    """Raised when a counter is leased by another owner."""
+
+
+class LeasingCounterHandler(SqliteCounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that stores the counter values
+    within a SQLite database shared by many processes.
+
+    Every read-modify-write is performed within a ``BEGIN IMMEDIATE`` transaction, hence increments
+    are atomic across processes. If ``lease_size`` is set, the first increment of an entity reserves
+    a block of ``lease_size`` values for this owner: the following increments are served from memory
+    until the block is exhausted, when the lease is released at once. Other owners incrementing an
+    entity leased by someone else mint their values directly in the database, beyond the reserved
+    block, whose unused values are then lost rather than given back: when the lease is extended,
+    the new block starts after the values minted by the other owners.
+
+    The last value actually handed out by each lease is written to the database whenever a
+    ``batch`` block exits or ``flush`` is called. ``release`` (also called when exiting a ``with``
+    block) gives back the unused part of every lease, while ``reconcile`` does the same for the
+    leases left behind by owners that crashed, setting their counters to the last written value."""
+
+    begin_statement: str = "BEGIN IMMEDIATE"
+
+    def __init__(self, database: str, lease_size: int = None, owner: str = None, timeout: float = 30.0) -> None:
+        """
+        Constructor of the ``LeasingCounterHandler`` class.
+
+        :param database: The name of the database
+        :type database: str
+        :param lease_size: The number of values reserved by each lease (defaults to None, i.e. no leases)
+        :type lease_size: int, optional
+        :param owner: The identifier of this owner (defaults to None, i.e. a unique one is generated)
+        :type owner: str, optional
+        :param timeout: How many seconds to wait for a lock held by another process (defaults to 30.0)
+        :type timeout: float, optional
+        :raises ValueError: if ``lease_size`` is not a positive integer.
+        """
+        if lease_size is not None and lease_size <= 0:
+            raise ValueError("lease_size must be a positive integer!")
+        super(LeasingCounterHandler, self).__init__(database, timeout)
+        self.cur.execute("""CREATE TABLE IF NOT EXISTS leases(
+            entity TEXT PRIMARY KEY,
+            owner TEXT,
+            used INTEGER,
+            reserved INTEGER)""")
+        self.lease_size: Optional[int] = lease_size
+        self.owner: str = owner if owner is not None else f'{os.getpid()}-{uuid.uuid4().hex}'
+        # The following variable maps an entity with the last value handed out and the last value reserved
+        self._leases: Dict[str, List[int]] = dict()
+        self._unflushed: Set[str] = set()
+
+    def set_counter(self, new_value: int, entity_name: str) -> None:
+        """
+        It allows to set the counter value of provenance entities, releasing the lease of this
+        owner on that entity, if any.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_name: The entity name
+        :type entity_name: str
+        :raises ValueError: if ``new_value`` is a negative integer.
+        :raises CounterLeaseError: if the entity is leased by another owner.
+        :return: None
+        """
+        self.set_counters({entity_name: new_value})
+
+    def read_counter(self, entity_name: str) -> int:
+        """
+        It allows to read the counter value of provenance entities. The counter of a leased entity
+        is the last value handed out by the lease.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :return: The requested counter value.
+        """
+        entity_name = str(entity_name)
+        return self.read_counters([entity_name])[entity_name]
+
+    def increment_counter(self, entity_name: str) -> int:
+        """
+        It allows to increment the counter value of graph and provenance entities by one unit.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :return: The newly-updated (already incremented) counter value.
+        """
+        entity_name = str(entity_name)
+        return self.increment_counters([entity_name])[entity_name]
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows to set the counter values of many provenance entities within a single transaction,
+        releasing the leases of this owner on those entities, if any.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :raises CounterLeaseError: if any of the entities is leased by another owner.
+        :return: None
+        """
+        new_values = {str(entity_name): new_value for entity_name, new_value in new_values.items()}
+        with self.batch():
+            self._check_leases(new_values)
+            self.cur.executemany("DELETE FROM leases WHERE entity = ?", [(entity_name,) for entity_name in new_values])
+            super(LeasingCounterHandler, self).set_counters(new_values)
+        for entity_name in new_values:
+            self._leases.pop(entity_name, None)
+            self._unflushed.discard(entity_name)
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to read the counter values of many provenance entities with as few queries as possible.
+        The counter of a leased entity is the last value handed out by the lease, as far as this owner knows.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its counter value.
+        """
+        entity_names = list(dict.fromkeys(str(entity_name) for entity_name in entity_names))
+        counters: Dict[str, int] = dict()
+        to_be_read: List[str] = list()
+        for entity_name in entity_names:
+            if entity_name in self._leases:
+                counters[entity_name] = self._leases[entity_name][0]
+            else:
+                to_be_read.append(entity_name)
+        for i in range(0, len(to_be_read), self.max_variables):
+            chunk = to_be_read[i:i + self.max_variables]
+            placeholders = ', '.join('?' * len(chunk))
+            # Once another owner has minted beyond a reserved block, the counter is the database one
+            result = self.cur.execute(f"""SELECT info.entity, CASE WHEN leases.reserved = info.count THEN leases.used ELSE info.count END
+                FROM info LEFT JOIN leases ON leases.entity = info.entity WHERE info.entity IN ({placeholders})""", chunk)
+            for entity_name, count in result.fetchall():
+                counters[entity_name] = count
+        return {entity_name: counters.get(entity_name, 0) for entity_name in entity_names}
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to increment the counter values of many graph and provenance entities by one unit.
+        The leases needed to serve the increments are acquired within a single transaction, in which
+        the entities leased by other owners are incremented directly.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its newly-updated (already incremented) counter value.
+        """
+        increments = Counter(str(entity_name) for entity_name in entity_names)
+        if self.lease_size is None:
+            return super(LeasingCounterHandler, self).increment_counters(increments.elements())
+        missing: Dict[str, int] = dict()
+        for entity_name, increment in increments.items():
+            lease = self._leases.get(entity_name)
+            available = lease[1] - lease[0] if lease is not None else 0
+            if available < increment:
+                missing[entity_name] = max(self.lease_size, increment - available)
+        counters: Dict[str, int] = dict()
+        if missing:
+            with self.batch():
+                leased_by_others = self._get_foreign_leases(missing)
+                if leased_by_others:
+                    direct_increments = Counter({entity_name: increments[entity_name] for entity_name in leased_by_others})
+                    counters.update(SqliteCounterHandler.increment_counters(self, direct_increments.elements()))
+                self._acquire_leases({entity_name: size for entity_name, size in missing.items() if entity_name not in leased_by_others})
+        exhausted: List[str] = list()
+        for entity_name, increment in increments.items():
+            if entity_name in counters:
+                continue
+            lease = self._leases[entity_name]
+            lease[0] += increment
+            counters[entity_name] = lease[0]
+            self._unflushed.add(entity_name)
+            if lease[0] == lease[1]:
+                exhausted.append(entity_name)
+        if exhausted:
+            self._release_leases(exhausted)
+        return counters
+
+    def flush(self) -> None:
+        """
+        It writes the last value handed out by each lease to the database.
+
+        :return: None
+        """
+        with self.batch():
+            pass
+
+    def release(self) -> None:
+        """
+        It releases every lease of this owner, giving back the values that were not handed out.
+
+        :return: None
+        """
+        if self._leases:
+            self._release_leases(list(self._leases))
+
+    def _release_leases(self, entity_names: List[str]) -> None:
+        # The counter is given back only if no other owner has minted beyond the reserved block
+        with self.batch():
+            self.cur.executemany(
+                "UPDATE info SET count = ? WHERE entity = ? AND count = ?",
+                [(self._leases[entity_name][0], entity_name, self._leases[entity_name][1]) for entity_name in entity_names])
+            self.cur.executemany(
+                "DELETE FROM leases WHERE entity = ? AND owner = ?",
+                [(entity_name, self.owner) for entity_name in entity_names])
+            self._unflushed.difference_update(entity_names)
+        for entity_name in entity_names:
+            del self._leases[entity_name]
+
+    def reconcile(self, owner: str = None) -> int:
+        """
+        It releases the leases held by other owners, e.g. processes that crashed before releasing them,
+        setting each counter to the last value written by the lease.
+        **It must be called only when no other owner is running!**
+
+        :param owner: If not None, only the leases of this owner are reconciled (defaults to None)
+        :type owner: str, optional
+        :return: The number of reconciled leases.
+        """
+        with self.batch():
+            if owner is None:
+                rows = self.cur.execute("SELECT entity, used, reserved FROM leases WHERE owner != ?", (self.owner,)).fetchall()
+            else:
+                rows = self.cur.execute("SELECT entity, used, reserved FROM leases WHERE owner = ?", (owner,)).fetchall()
+            self.cur.executemany(
+                "UPDATE info SET count = ? WHERE entity = ? AND count = ?",
+                [(used, entity_name, reserved) for entity_name, used, reserved in rows])
+            self.cur.executemany("DELETE FROM leases WHERE entity = ?", [(entity_name,) for entity_name, _, _ in rows])
+        return len(rows)
+
+    def close(self) -> None:
+        """
+        It releases every lease of this owner and closes the connection to the database.
+
+        :return: None
+        """
+        self.release()
+        super(LeasingCounterHandler, self).close()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+    def _before_commit(self) -> None:
+        if self._unflushed:
+            self.cur.executemany(
+                "UPDATE leases SET used = ? WHERE entity = ? AND owner = ?",
+                [(self._leases[entity_name][0], entity_name, self.owner) for entity_name in self._unflushed])
+            self._unflushed = set()
+
+    def _check_leases(self, entity_names: Iterable[str]) -> None:
+        for entity_name, owner in self._get_foreign_leases(entity_names).items():
+            raise CounterLeaseError(f"The counter of '{entity_name}' is leased by '{owner}'")
+
+    def _get_foreign_leases(self, entity_names: Iterable[str]) -> Dict[str, str]:
+        entity_names = list(entity_names)
+        owners: Dict[str, str] = dict()
+        for i in range(0, len(entity_names), self.max_variables):
+            chunk = entity_names[i:i + self.max_variables]
+            placeholders = ', '.join('?' * len(chunk))
+            result = self.cur.execute(
+                f"SELECT entity, owner FROM leases WHERE entity IN ({placeholders}) AND owner != ?", chunk + [self.owner])
+            owners.update(result.fetchall())
+        return owners
+
+    def _acquire_leases(self, sizes: Dict[str, int]) -> None:
+        if not sizes:
+            return
+        with self.batch():
+            counters = SqliteCounterHandler.read_counters(self, sizes)
+            rows = list()
+            for entity_name, size in sizes.items():
+                lease = self._leases.get(entity_name)
+                if lease is not None and lease[1] == counters[entity_name]:
+                    used = lease[0]
+                else:
+                    # Another owner has minted beyond the reserved block, hence its unused values
+                    # are dropped and the new block starts after the database counter
+                    used = counters[entity_name]
+                    if lease is not None:
+                        size += lease[1] - lease[0]
+                rows.append((entity_name, used, counters[entity_name] + size))
+            SqliteCounterHandler.set_counters(self, {entity_name: reserved for entity_name, _, reserved in rows})
+            self.cur.executemany(
+                "INSERT OR REPLACE INTO leases (entity, owner, used, reserved) VALUES (?, ?, ?, ?)",
+                [(entity_name, self.owner, used, reserved) for entity_name, used, reserved in rows])
+        for entity_name, used, reserved in rows:
+            self._leases[entity_name] = [used, reserved]
@@ -0,0 +1,229 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2023, Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import json
+import os
+import re
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Generator, Iterable, List, Set
+
+from counter_handler.counter_handler import CounterHandler
+from support import entity_regex, is_string_empty, write_file_atomically
+
+
+class ShardedFilesystemCounterHandler(CounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that persistently stores
+    the counter values within the filesystem, split into many small JSON files (shards).
+
+    The shard of an OCDM entity is identified by its short name (e.g. ``br``), its supplier prefix
+    and the range its numeric identifier falls in, e.g. ``<info_dir>/br/060/0.json``.
+    Entities whose IRI does not follow the OCDM pattern are spread over ``<info_dir>/_/`` by hash.
+    Shards are loaded lazily and kept in a least-recently-used cache of ``max_loaded_shards`` entries.
+
+    By default, every change is written as soon as it is performed, while changes performed within
+    a ``batch`` block are written when the block exits, once per shard. In write-back mode, changes
+    are written only by ``flush``, when exiting a ``with`` block, or when their shard is evicted
+    from the cache. Every shard is replaced atomically."""
+
+    def __init__(self, info_dir: str, shard_size: int = 10000, max_loaded_shards: int = 256,
+                 write_back: bool = False) -> None:
+        """
+        Constructor of the ``ShardedFilesystemCounterHandler`` class.
+
+        :param info_dir: The path to the folder that does/will contain the counter values.
+        :type info_dir: str
+        :param shard_size: The width of the range of numeric identifiers stored in each shard (defaults to 10000)
+        :type shard_size: int, optional
+        :param max_loaded_shards: The maximum number of shards kept in memory (defaults to 256)
+        :type max_loaded_shards: int, optional
+        :param write_back: Whether to keep the changes in memory until they are flushed (defaults to False)
+        :type write_back: bool, optional
+        :raises ValueError: if ``info_dir`` is None or an empty string, or if ``shard_size``
+          or ``max_loaded_shards`` is not a positive integer.
+        """
+        if info_dir is None or is_string_empty(info_dir):
+            raise ValueError("info_dir parameter is required!")
+        if shard_size <= 0 or max_loaded_shards <= 0:
+            raise ValueError("shard_size and max_loaded_shards must be positive integers!")
+
+        self.info_dir: str = info_dir
+        self.shard_size: int = shard_size
+        self.max_loaded_shards: int = max_loaded_shards
+        self.write_back: bool = write_back
+        self._shards: OrderedDict[str, Dict[str, int]] = OrderedDict()
+        self._dirty_shards: Set[str] = set()
+        self._batch_depth: int = 0
+
+    @contextmanager
+    def batch(self) -> Generator[ShardedFilesystemCounterHandler, None, None]:
+        """
+        It defers the writes performed within a ``with`` block until the outermost block exits,
+        so that each changed shard is written only once.
+
+        :return: A context manager yielding this counter handler
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0 and not self.write_back:
+            self.flush()
+
+    def set_counter(self, new_value: int, entity_name: str) -> None:
+        """
+        It allows to set the counter value of provenance entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_name: The entity name
+        :type entity_name: str
+        :raises ValueError: if ``new_value`` is a negative integer.
+        :return: None
+        """
+        self.set_counters({entity_name: new_value})
+
+    def read_counter(self, entity_name: str) -> int:
+        """
+        It allows to read the counter value of provenance entities.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :return: The requested counter value.
+        """
+        entity_name = str(entity_name)
+        return self._get_shard(self._get_shard_path(entity_name)).get(entity_name, 0)
+
+    def increment_counter(self, entity_name: str) -> int:
+        """
+        It allows to increment the counter value of provenance entities by one unit.
+
+        :param entity_name: The entity name
+        :type entity_name: str
+        :return: The newly-updated (already incremented) counter value.
+        """
+        entity_name = str(entity_name)
+        return self.increment_counters([entity_name])[entity_name]
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows to set the counter values of many provenance entities, touching each shard only once.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        new_values = {str(entity_name): new_value for entity_name, new_value in new_values.items()}
+        if any(new_value < 0 for new_value in new_values.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        for shard_path, entity_names in self._group_by_shard(new_values).items():
+            shard = self._get_shard(shard_path)
+            for entity_name in entity_names:
+                shard[entity_name] = new_values[entity_name]
+            self._store_shard(shard_path)
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to read the counter values of many provenance entities, touching each shard only once.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its counter value.
+        """
+        entity_names = [str(entity_name) for entity_name in entity_names]
+        counters: Dict[str, int] = dict()
+        for shard_path, shard_entity_names in self._group_by_shard(entity_names).items():
+            shard = self._get_shard(shard_path)
+            for entity_name in shard_entity_names:
+                counters[entity_name] = shard.get(entity_name, 0)
+        return {entity_name: counters[entity_name] for entity_name in entity_names}
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to increment the counter values of many provenance entities by one unit,
+        touching each shard only once.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its newly-updated (already incremented) counter value.
+        """
+        entity_names = [str(entity_name) for entity_name in entity_names]
+        counters: Dict[str, int] = dict()
+        for shard_path, shard_entity_names in self._group_by_shard(entity_names).items():
+            shard = self._get_shard(shard_path)
+            for entity_name in shard_entity_names:
+                shard[entity_name] = shard.get(entity_name, 0) + 1
+                counters[entity_name] = shard[entity_name]
+            self._store_shard(shard_path)
+        return {entity_name: counters[entity_name] for entity_name in entity_names}
+
+    def flush(self) -> None:
+        """
+        It writes every shard changed since the last flush.
+
+        :return: None
+        """
+        for shard_path in list(self._dirty_shards):
+            self._write_shard(shard_path)
+
+    def _get_shard_path(self, entity_name: str) -> str:
+        match = re.match(entity_regex, entity_name)
+        if match is None:
+            return os.path.join(self.info_dir, '_', f'{zlib.crc32(entity_name.encode("utf8")) % 1024}.json')
+        short_name: str = match.group(2)
+        prefix: str = match.group(3) or '_'
+        # Ranges of identifiers, e.g. 1-10, are stored with their first identifier
+        number: int = int(match.group(4).split('-')[0])
+        return os.path.join(self.info_dir, short_name, prefix, f'{number // self.shard_size}.json')
+
+    def _group_by_shard(self, entity_names: Iterable[str]) -> Dict[str, List[str]]:
+        shards: Dict[str, List[str]] = dict()
+        for entity_name in entity_names:
+            shards.setdefault(self._get_shard_path(entity_name), []).append(entity_name)
+        return shards
+
+    def _get_shard(self, shard_path: str) -> Dict[str, int]:
+        if shard_path in self._shards:
+            self._shards.move_to_end(shard_path)
+            return self._shards[shard_path]
+        if os.path.isfile(shard_path):
+            with open(shard_path, 'r', encoding='utf8') as shard_file:
+                shard: Dict[str, int] = json.load(shard_file)
+        else:
+            shard: Dict[str, int] = dict()
+        self._shards[shard_path] = shard
+        while len(self._shards) > self.max_loaded_shards:
+            evicted_path, _ = next(iter(self._shards.items()))
+            if evicted_path in self._dirty_shards:
+                self._write_shard(evicted_path)
+            del self._shards[evicted_path]
+        return shard
+
+    def _store_shard(self, shard_path: str) -> None:
+        self._dirty_shards.add(shard_path)
+        if not self.write_back and self._batch_depth == 0:
+            self._write_shard(shard_path)
+
+    def _write_shard(self, shard_path: str) -> None:
+        write_file_atomically(shard_path, json.dumps(self._shards[shard_path], ensure_ascii=False, indent=None))
+        self._dirty_shards.discard(shard_path)
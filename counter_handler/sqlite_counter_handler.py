@@ -13,29 +13,82 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+from __future__ import annotations
 
 import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Generator, Iterable, List, Tuple
 
 from counter_handler.counter_handler import CounterHandler
 
 
 class SqliteCounterHandler(CounterHandler):
     """A concrete implementation of the ``CounterHandler`` interface that persistently stores
-    the counter values within a SQLite database."""
+    the counter values within a SQLite database.
+
+    Every statement is parameterized, the database is opened in WAL journal mode and
+    each increment is a single UPSERT statement. Operations performed within a ``batch``
+    block are committed in a single transaction."""
+
+    # UPSERT statements are supported since SQLite 3.24.0, RETURNING clauses since SQLite 3.35.0
+    supports_upsert: bool = sqlite3.sqlite_version_info >= (3, 24, 0)
+    supports_returning: bool = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+    # The statement opening the transactions of the batch method
+    begin_statement: str = "BEGIN"
 
-    def __init__(self, database: str) -> None:
+    def __init__(self, database: str, timeout: float = 5.0) -> None:
         """
         Constructor of the ``SqliteCounterHandler`` class.
 
         :param database: The name of the database
         :type info_dir: str
+        :param timeout: How many seconds to wait for a lock held by another connection (defaults to 5.0)
+        :type timeout: float, optional
         """
         sqlite3.threadsafety = 3
-        self.con = sqlite3.connect(database)
+        self.max_variables = 500
+        # Transactions are handled explicitly, see the batch method. The connection can be used
+        # from another thread, e.g. by ExecutorCounterHandler, as long as it is never used by two at once
+        self.con = sqlite3.connect(database, timeout=timeout, isolation_level=None, check_same_thread=False)
         self.cur = self.con.cursor()
+        self.cur.execute("PRAGMA journal_mode=WAL")
         self.cur.execute("""CREATE TABLE IF NOT EXISTS info(
             entity TEXT PRIMARY KEY, 
             count INTEGER)""")
+        self._batch_depth: int = 0
+
+    @contextmanager
+    def batch(self) -> Generator[SqliteCounterHandler, None, None]:
+        """
+        It opens a transaction that is committed when the outermost ``batch`` block exits,
+        or rolled back if an exception is raised within it.
+
+        :return: A context manager yielding this counter handler
+        """
+        if self._batch_depth == 0:
+            self.cur.execute(self.begin_statement)
+        self._batch_depth += 1
+        try:
+            yield self
+            if self._batch_depth == 1:
+                self._before_commit()
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.cur.execute("ROLLBACK")
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.cur.execute("COMMIT")
+
+    def _before_commit(self) -> None:
+        # Hook for subclasses that need to write within the outermost transaction before it is committed
+        pass
 
     def set_counter(self, new_value: int, entity_name: str) -> None:
         """
@@ -51,8 +104,8 @@ class SqliteCounterHandler(CounterHandler):
         entity_name = str(entity_name)
         if new_value < 0:
             raise ValueError("new_value must be a non negative integer!")
-        self.cur.execute(f"INSERT OR REPLACE INTO info (entity, count) VALUES ('{entity_name}', {new_value})")
-        self.con.commit()
+        with self.batch():
+            self.cur.execute("INSERT OR REPLACE INTO info (entity, count) VALUES (?, ?)", (entity_name, new_value))
 
     def read_counter(self, entity_name: str) -> int:
         """
@@ -63,7 +116,7 @@ class SqliteCounterHandler(CounterHandler):
         :return: The requested counter value.
         """
         entity_name = str(entity_name)
-        result = self.cur.execute(f"SELECT count FROM info WHERE entity='{entity_name}'")
+        result = self.cur.execute("SELECT count FROM info WHERE entity = ?", (entity_name,))
         rows = result.fetchall()
         if len(rows) == 1:
             return rows[0][0]
@@ -81,7 +134,77 @@ class SqliteCounterHandler(CounterHandler):
         :return: The newly-updated (already incremented) counter value.
         """
         entity_name = str(entity_name)
-        cur_count = self.read_counter(entity_name)
-        count = cur_count + 1
-        self.set_counter(count, entity_name)
-        return count
\ No newline at end of file
+        with self.batch():
+            if self.supports_returning:
+                upsert = "INSERT INTO info (entity, count) VALUES (?, 1) ON CONFLICT(entity) DO UPDATE SET count = count + 1 RETURNING count"
+                rows = self.cur.execute(upsert, (entity_name,)).fetchall()
+            else:
+                self._add_to_counters([(entity_name, 1)])
+                rows = self.cur.execute("SELECT count FROM info WHERE entity = ?", (entity_name,)).fetchall()
+        return rows[0][0]
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        """
+        It allows to set the counter values of many provenance entities within a single transaction.
+
+        :param new_values: A dictionary mapping each entity name to the new counter value to be set
+        :type new_values: Dict[str, int]
+        :raises ValueError: if any of the new values is a negative integer.
+        :return: None
+        """
+        rows = [(str(entity_name), new_value) for entity_name, new_value in new_values.items()]
+        if any(new_value < 0 for _, new_value in rows):
+            raise ValueError("new_value must be a non negative integer!")
+        with self.batch():
+            self.cur.executemany("INSERT OR REPLACE INTO info (entity, count) VALUES (?, ?)", rows)
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to read the counter values of many provenance entities with as few queries as possible.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its counter value.
+        """
+        entity_names = list(dict.fromkeys(str(entity_name) for entity_name in entity_names))
+        counters: Dict[str, int] = dict.fromkeys(entity_names, 0)
+        # SQLite limits the number of host parameters of a single statement
+        for i in range(0, len(entity_names), self.max_variables):
+            chunk = entity_names[i:i + self.max_variables]
+            placeholders = ', '.join('?' * len(chunk))
+            result = self.cur.execute(f"SELECT entity, count FROM info WHERE entity IN ({placeholders})", chunk)
+            for entity_name, count in result.fetchall():
+                counters[entity_name] = count
+        return counters
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        """
+        It allows to increment the counter values of many graph and provenance entities by one unit
+        within a single transaction.
+
+        :param entity_names: The entity names
+        :type entity_names: Iterable[str]
+        :return: A dictionary mapping each entity name to its newly-updated (already incremented) counter value.
+        """
+        increments = Counter(str(entity_name) for entity_name in entity_names)
+        with self.batch():
+            self._add_to_counters(list(increments.items()))
+            return self.read_counters(increments)
+
+    def _add_to_counters(self, increments: List[Tuple[str, int]]) -> None:
+        if self.supports_upsert:
+            self.cur.executemany(
+                "INSERT INTO info (entity, count) VALUES (?, ?) ON CONFLICT(entity) DO UPDATE SET count = count + excluded.count",
+                increments)
+            return
+        # Older versions of SQLite insert the missing counters first, then update every counter
+        self.cur.executemany("INSERT OR IGNORE INTO info (entity, count) VALUES (?, 0)", [(entity_name,) for entity_name, _ in increments])
+        self.cur.executemany("UPDATE info SET count = count + ? WHERE entity = ?", [(increment, entity_name) for entity_name, increment in increments])
+
+    def close(self) -> None:
+        """
+        It closes the connection to the database.
+
+        :return: None
+        """
+        self.con.close()
@@ -0,0 +1,256 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Generator, Iterable, Iterator, List, Optional, Set, Tuple
+
+    from rdflib.graph import Graph
+    from rdflib.term import Node
+
+from array import array
+
+from rdflib import Literal, URIRef, plugin
+from rdflib.store import Store
+
+
+class DictionaryStore(Store):
+    """A context-aware rdflib ``Store`` that interns every term into an integer id and
+    keeps the statements as flat arrays of 64-bit integers, rather than as nested
+    dictionaries of terms.
+
+    Each term object is held once, in the dictionary of terms. The SPO index maps
+    every subject to an array of ``(predicate, object, context)`` rows, while the OSP
+    index maps every object that is not a literal to an array of
+    ``(subject, predicate, context)`` rows. Patterns with a subject or a non-literal
+    object are answered by one of the two indexes, any other pattern by a scan.
+
+    The store is registered as the ``Dictionary`` plugin, e.g.
+    ``OCDMConjunctiveGraph(store='Dictionary')``."""
+
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = False
+
+    def __init__(self, configuration: Optional[str] = None, identifier: Optional[Node] = None) -> None:
+        super(DictionaryStore, self).__init__(configuration)
+        self.identifier = identifier
+        # Ids are never reused, hence terms are kept even when their statements are removed
+        self.__ids: Dict[Node, int] = dict()
+        self.__terms: List[Node] = []
+        self.__spo: Dict[int, array] = dict()
+        self.__osp: Dict[int, array] = dict()
+        self.__contexts: Dict[int, Graph] = dict()
+        self.__context_sizes: Dict[int, int] = dict()
+        self.__size: int = 0
+        self.__namespace: Dict[str, URIRef] = dict()
+        self.__prefix: Dict[URIRef, str] = dict()
+
+    def add(self, triple: Tuple[Node, Node, Node], context: Graph, quoted: bool = False) -> None:
+        Store.add(self, triple, context, quoted=quoted)
+        s, p, o = triple
+        s_id, p_id, o_id = self.__get_id(s), self.__get_id(p), self.__get_id(o)
+        c_id = self.__get_context_id(context)
+        rows = self.__spo.get(s_id)
+        if rows is None:
+            rows = self.__spo[s_id] = array('q')
+            contexts = []
+        else:
+            contexts = _get_row_contexts(rows, p_id, o_id)
+            if c_id in contexts:
+                return
+        rows.extend((p_id, o_id, c_id))
+        if not isinstance(o, Literal):
+            osp_rows = self.__osp.get(o_id)
+            if osp_rows is None:
+                osp_rows = self.__osp[o_id] = array('q')
+            osp_rows.extend((s_id, p_id, c_id))
+        self.__context_sizes[c_id] = self.__context_sizes.get(c_id, 0) + 1
+        if not contexts:
+            self.__size += 1
+
+    def remove(self, triple_pattern: Tuple[Optional[Node], Optional[Node], Optional[Node]], context: Optional[Graph] = None) -> None:
+        removed: Dict[int, Set[Tuple[int, int, int]]] = dict()
+        for s_id, p_id, o_id, c_id in self.__match(triple_pattern, context):
+            removed.setdefault(s_id, set()).add((p_id, o_id, c_id))
+        removed_osp: Dict[int, Set[Tuple[int, int, int]]] = dict()
+        for s_id, statements in removed.items():
+            rows = self.__spo[s_id]
+            _remove_rows(rows, statements)
+            for p_id, o_id, c_id in statements:
+                self.__context_sizes[c_id] -= 1
+                if o_id in self.__osp:
+                    removed_osp.setdefault(o_id, set()).add((s_id, p_id, c_id))
+            for p_id, o_id in {(p_id, o_id) for p_id, o_id, _ in statements}:
+                if not _get_row_contexts(rows, p_id, o_id):
+                    self.__size -= 1
+            if not rows:
+                del self.__spo[s_id]
+        for o_id, statements in removed_osp.items():
+            rows = self.__osp[o_id]
+            _remove_rows(rows, statements)
+            if not rows:
+                del self.__osp[o_id]
+
+    def triples(self, triple_pattern: Tuple[Optional[Node], Optional[Node], Optional[Node]], context: Optional[Graph] = None) -> Generator[Tuple[Tuple[Node, Node, Node], Iterator[Graph]], None, None]:
+        statements: Dict[Tuple[int, int, int], List[int]] = dict()
+        cur_subject: Optional[int] = None
+        for s_id, p_id, o_id, c_id in self.__match(triple_pattern, context):
+            # Rows are grouped by subject, hence the contexts of a statement are collected
+            # before moving to the next subject
+            if s_id != cur_subject and statements:
+                yield from self.__get_triples(statements)
+                statements = dict()
+            cur_subject = s_id
+            statements.setdefault((s_id, p_id, o_id), []).append(c_id)
+        yield from self.__get_triples(statements)
+
+    def __get_triples(self, statements: Dict[Tuple[int, int, int], List[int]]) -> Generator[Tuple[Tuple[Node, Node, Node], Iterator[Graph]], None, None]:
+        terms = self.__terms
+        for (s_id, p_id, o_id), contexts in statements.items():
+            yield (terms[s_id], terms[p_id], terms[o_id]), iter([self.__contexts[c_id] for c_id in contexts if c_id in self.__contexts])
+
+    def __match(self, triple_pattern: Tuple[Optional[Node], Optional[Node], Optional[Node]], context: Optional[Graph] = None) -> List[Tuple[int, int, int, int]]:
+        # The matching rows are returned as a list, so that the store can be changed
+        # while the caller iterates over them
+        ids: List[Optional[int]] = []
+        for term in (*triple_pattern, None if context is None else context.identifier):
+            term_id = None if term is None else self.__ids.get(term)
+            if term is not None and term_id is None:
+                return []
+            ids.append(term_id)
+        s_id, p_id, o_id, c_id = ids
+        matches: List[Tuple[int, int, int, int]] = []
+        if s_id is not None:
+            buckets = [(s_id, self.__spo.get(s_id, ()))]
+        elif o_id is not None and not isinstance(triple_pattern[2], Literal):
+            rows = self.__osp.get(o_id, ()).tolist() if o_id in self.__osp else []
+            for i in range(0, len(rows), 3):
+                if (p_id is None or rows[i + 1] == p_id) and (c_id is None or rows[i + 2] == c_id):
+                    matches.append((rows[i], rows[i + 1], o_id, rows[i + 2]))
+            matches.sort(key=lambda row: row[0])
+            return matches
+        else:
+            buckets = self.__spo.items()
+        for cur_s_id, rows in buckets:
+            rows = rows.tolist() if rows else []
+            for i in range(0, len(rows), 3):
+                if (p_id is None or rows[i] == p_id) and (o_id is None or rows[i + 1] == o_id) and (c_id is None or rows[i + 2] == c_id):
+                    matches.append((cur_s_id, rows[i], rows[i + 1], rows[i + 2]))
+        return matches
+
+    def contexts(self, triple: Optional[Tuple[Node, Node, Node]] = None) -> Generator[Graph, None, None]:
+        if triple is None or triple == (None, None, None):
+            yield from list(self.__contexts.values())
+            return
+        for _, contexts in self.triples(triple):
+            yield from contexts
+
+    def __len__(self, context: Optional[Graph] = None) -> int:
+        if context is None:
+            return self.__size
+        c_id = self.__ids.get(context.identifier)
+        return 0 if c_id is None else self.__context_sizes.get(c_id, 0)
+
+    def add_graph(self, graph: Graph) -> None:
+        self.__get_context_id(graph)
+
+    def remove_graph(self, graph: Graph) -> None:
+        self.remove((None, None, None), graph)
+        c_id = self.__ids.get(graph.identifier)
+        if c_id is not None:
+            self.__contexts.pop(c_id, None)
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True) -> None:
+        bound_namespace = self.__namespace.get(prefix)
+        bound_prefix = self.__prefix.get(namespace)
+        if bound_prefix is None and bound_namespace is not None:
+            bound_prefix = self.__prefix.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self.__namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self.__prefix[bound_namespace]
+            self.__prefix[namespace] = prefix
+            self.__namespace[prefix] = namespace
+        else:
+            namespace = bound_namespace if bound_namespace is not None else namespace
+            prefix = bound_prefix if bound_prefix is not None else prefix
+            self.__prefix[namespace] = prefix
+            self.__namespace[prefix] = namespace
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        return self.__namespace.get(prefix, None)
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        return self.__prefix.get(namespace, None)
+
+    def namespaces(self) -> Iterator[Tuple[str, URIRef]]:
+        for prefix, namespace in list(self.__namespace.items()):
+            yield prefix, namespace
+
+    def __get_id(self, term: Node) -> int:
+        term_id = self.__ids.get(term)
+        if term_id is None:
+            term_id = self.__ids[term] = len(self.__terms)
+            self.__terms.append(term)
+        return term_id
+
+    def __get_context_id(self, context: Optional[Graph]) -> int:
+        if context is None:
+            return -1
+        c_id = self.__get_id(context.identifier)
+        if c_id not in self.__contexts:
+            self.__contexts[c_id] = context
+        return c_id
+
+
+def _get_row_contexts(rows: array, first: int, second: int) -> List[int]:
+    # Rows are flat (first, second, context) triples: array.index hops between the
+    # occurrences of the first value in C, and only aligned occurrences are rows
+    contexts: List[int] = []
+    i: int = 0
+    while True:
+        try:
+            i = rows.index(first, i)
+        except ValueError:
+            return contexts
+        if i % 3 == 0 and rows[i + 1] == second:
+            contexts.append(rows[i + 2])
+        i += 1
+
+
+def _remove_rows(rows: array, removed: Iterable[Tuple[int, int, int]]) -> None:
+    # Rows are located like in _get_row_contexts and deleted in place, which keeps the
+    # removal cheap even for the large OSP rows of classes and other frequent objects
+    for first, second, third in removed:
+        i: int = 0
+        while True:
+            try:
+                i = rows.index(first, i)
+            except ValueError:
+                break
+            if i % 3 == 0 and rows[i + 1] == second and rows[i + 2] == third:
+                del rows[i:i + 3]
+                break
+            i += 1
+
+
+plugin.register('Dictionary', Store, 'dictionary_store', 'DictionaryStore')
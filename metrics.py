@@ -0,0 +1,212 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, ContextManager, Dict, Generator, Iterable, List, Tuple
+
+from counter_handler.counter_handler import CounterHandler
+from support import write_file_atomically
+
+SECONDS_BUCKETS: Tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+SIZE_BUCKETS: Tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 10000)
+
+
+class Histogram(object):
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets: Tuple[float, ...] = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics(object):
+    """It collects the timings of the phases of a provenance run, the latency of the
+    counter handler, the size of the diff of every subject and a few counters.
+
+    Every series is identified by a name and a set of labels, e.g. the ``phase_seconds``
+    histogram has a ``phase`` label. Series can be exported in the Prometheus text format
+    or as JSON."""
+
+    enabled: bool = True
+
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = dict()
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = dict()
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('phase_seconds', time.perf_counter() - start, SECONDS_BUCKETS, phase=name)
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = SECONDS_BUCKETS, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in self.counters.items()],
+            'histograms': [{
+                'name': name, 'labels': dict(labels), 'count': histogram.count, 'sum': histogram.sum,
+                'buckets': {str(bound): count for bound, count in zip(histogram.buckets + ('+Inf',), _cumulate(histogram.counts))}
+            } for (name, labels), histogram in self.histograms.items()]
+        }
+
+    def to_prometheus(self, prefix: str = 'rdflib_ocdm_') -> str:
+        lines: List[str] = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f'# TYPE {prefix}{name} counter')
+            for (cur_name, labels), value in self.counters.items():
+                if cur_name == name:
+                    lines.append(f'{prefix}{name}{_format_labels(labels)} {value}')
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f'# TYPE {prefix}{name} histogram')
+            for (cur_name, labels), histogram in self.histograms.items():
+                if cur_name != name:
+                    continue
+                for bound, count in zip(histogram.buckets + ('+Inf',), _cumulate(histogram.counts)):
+                    lines.append(f'{prefix}{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {count}')
+                lines.append(f'{prefix}{name}_sum{_format_labels(labels)} {histogram.sum}')
+                lines.append(f'{prefix}{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file_path: str, format: str = 'prometheus') -> None:
+        """
+        It writes the metrics to a file, replacing it atomically, e.g. for the textfile
+        collector of the Prometheus node exporter.
+
+        :param file_path: The path of the file
+        :type file_path: str
+        :param format: Either ``prometheus`` or ``json`` (defaults to ``prometheus``)
+        :type format: str, optional
+        :raises ValueError: if the format is not supported.
+        :return: None
+        """
+        if format == 'prometheus':
+            write_file_atomically(file_path, self.to_prometheus())
+        elif format == 'json':
+            write_file_atomically(file_path, json.dumps(self.to_json(), indent=2))
+        else:
+            raise ValueError(f"Unsupported metrics format: {format}")
+
+
+class NullMetrics(Metrics):
+    """A ``Metrics`` object that records nothing, used when instrumentation is disabled."""
+
+    enabled: bool = False
+
+    def phase(self, name: str) -> ContextManager[None]:
+        return nullcontext()
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = SECONDS_BUCKETS, **labels: str) -> None:
+        pass
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        pass
+
+
+class InstrumentedCounterHandler(CounterHandler):
+    """A ``CounterHandler`` that records the latency of every operation of the wrapped
+    counter handler in the ``counter_handler_seconds`` histogram. Any other attribute,
+    e.g. ``close``, is looked up on the wrapped counter handler."""
+
+    def __init__(self, counter_handler: CounterHandler, metrics: Metrics) -> None:
+        self.counter_handler: CounterHandler = counter_handler
+        self.metrics: Metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.counter_handler, name)
+
+    def set_counter(self, new_value: int, entity_name: str) -> None:
+        with self._timed('set_counter'):
+            self.counter_handler.set_counter(new_value, entity_name)
+
+    def read_counter(self, entity_name: str) -> int:
+        with self._timed('read_counter'):
+            return self.counter_handler.read_counter(entity_name)
+
+    def increment_counter(self, entity_name: str) -> int:
+        with self._timed('increment_counter'):
+            return self.counter_handler.increment_counter(entity_name)
+
+    def set_counters(self, new_values: Dict[str, int]) -> None:
+        with self._timed('set_counters'):
+            self.counter_handler.set_counters(new_values)
+
+    def read_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        with self._timed('read_counters'):
+            return self.counter_handler.read_counters(entity_names)
+
+    def increment_counters(self, entity_names: Iterable[str]) -> Dict[str, int]:
+        with self._timed('increment_counters'):
+            return self.counter_handler.increment_counters(entity_names)
+
+    def flush(self) -> None:
+        with self._timed('flush'):
+            self.counter_handler.flush()
+
+    @contextmanager
+    def batch(self) -> Generator[InstrumentedCounterHandler, None, None]:
+        with self.counter_handler.batch():
+            yield self
+
+    @contextmanager
+    def _timed(self, operation: str) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metrics.observe('counter_handler_seconds', time.perf_counter() - start, SECONDS_BUCKETS, operation=operation)
+
+
+def _cumulate(counts: List[int]) -> List[int]:
+    cumulated: List[int] = []
+    total: int = 0
+    for count in counts:
+        total += count
+        cumulated.append(total)
+    return cumulated
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"' for key, value in labels)
+    return '{' + ','.join(escaped) + '}'
@@ -0,0 +1,56 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rdflib.term import Node
+
+from functools import lru_cache
+
+from rdflib import Literal
+
+# Rows follow the escaping rules of the nt11 serializer of rdflib, but they are written
+# straight from the terms, without any intermediate Graph, serializer or stream
+
+@lru_cache(maxsize=65536, typed=True)
+def _get_node_string(node: Node) -> str:
+    # IRIs recur across statements, hence their validation and formatting are cached
+    return node.n3()
+
+def get_term_string(term: Node) -> str:
+    if not isinstance(term, Literal):
+        return _get_node_string(term)
+    value: str = str(term)
+    if '\\' in value or '"' in value or '\n' in value or '\r' in value:
+        value = value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"').replace('\r', '\\r')
+    if term.language:
+        return f'"{value}"@{term.language}'
+    elif term.datatype:
+        return f'"{value}"^^<{term.datatype}>'
+    return f'"{value}"'
+
+def get_nt_row(statement: tuple) -> str:
+    # Only the triple of a quad is written
+    return f'{_get_node_string(statement[0])} {_get_node_string(statement[1])} {get_term_string(statement[2])} .'
+
+def get_nq_row(statement: tuple) -> str:
+    # Statements of the default graph, i.e. with no graph or a None graph, are written as triples
+    if len(statement) < 4 or statement[3] is None:
+        return get_nt_row(statement) + '\n'
+    return f'{_get_node_string(statement[0])} {_get_node_string(statement[1])} {get_term_string(statement[2])} {_get_node_string(statement[3])} .\n'
@@ -20,75 +20,278 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from rdflib import URIRef
-    from typing import List, Tuple, Optional
+    from counter_handler.async_counter_handler import AsyncCounterHandler
+    from metrics import Metrics
+    from rdflib.store import Store
+    from prov.provenance_sink import ProvenanceSink
+    from typing import Dict, Generator, Iterable, List, Tuple, Optional
 
-from copy import deepcopy
+from abc import ABC, abstractmethod
 from datetime import datetime, timezone
 
 from rdflib import ConjunctiveGraph, Graph
 
 from counter_handler.counter_handler import CounterHandler
+# Importing the module registers the Dictionary store plugin
+import dictionary_store
 from prov.prov_entity import ProvEntity
 from prov.provenance import OCDMProvenance
 from prov.snapshot_entity import SnapshotEntity
 
 
-class OCDMGraphCommons():
-    def __init__(self, counter_handler: CounterHandler):
-        self.__merge_index = dict()
+class OCDMGraphCommons(ABC):
+    def __init__(self, counter_handler: CounterHandler, metrics: Metrics = None, max_snapshots_in_memory: int = None, max_bytes_in_memory: int = None):
+        # The following variables map each surviving entity with the entities merged into it,
+        # in merge order, and each merged entity with the entity it was merged into
+        self.__merge_index: Dict[URIRef, List[URIRef]] = dict()
+        self.__merged_into: Dict[URIRef, URIRef] = dict()
         self.__entity_index = dict()
-        self.provenance = OCDMProvenance(self, counter_handler)
-
-    def preexisting_finished(self: Graph|ConjunctiveGraph|OCDMGraphCommons, resp_agent: str = None, source: str = None, c_time: str = None):
-        self.preexisting_graph = deepcopy(self)
-        for subject in self.subjects(unique=True):
-            self.__entity_index[subject] = {'to_be_deleted': False, 'resp_agent': resp_agent, 'source': source}
-            count = self.provenance.counter_handler.read_counter(subject)
-            if count == 0:
-                if c_time is None:
-                    cur_time: str = datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
-                else:
-                    cur_time: str = datetime.fromtimestamp(c_time, tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
-                new_snapshot: SnapshotEntity = self.provenance._create_snapshot(subject, cur_time)
-                new_snapshot.has_description(f"The entity '{str(subject)}' has been created.")
+        # The following variable maps a subject with the net additions and removals
+        # of its statements performed since the baseline was taken
+        self.__journal: Dict[URIRef, Dict[str, Dict[tuple, None]]] = dict()
+        self.__is_tracking = False
+        self.__is_lazy = False
+        self.__resp_agent: Optional[str] = None
+        self.__source: Optional[str] = None
+        self.provenance = OCDMProvenance(self, counter_handler, metrics, max_snapshots_in_memory, max_bytes_in_memory=max_bytes_in_memory)
+        self.metrics: Metrics = self.provenance.metrics
+
+    def preexisting_finished(self: Graph|ConjunctiveGraph|OCDMGraphCommons, resp_agent: str = None, source: str = None, c_time: str = None, lazy: bool = False):
+        self.__journal = dict()
+        self.__is_tracking = True
+        self.__is_lazy = lazy
+        self.__resp_agent = resp_agent
+        self.__source = source
+        if c_time is None:
+            self.__baseline_time: str = datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
+        else:
+            self.__baseline_time: str = datetime.fromtimestamp(c_time, tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
+        if lazy:
+            # Entities are registered, and their counters read, only when they are first changed
+            return
+        with self.metrics.phase('preexisting_finished'):
+            subjects: List[URIRef] = list(self.subjects(unique=True))
+            for subject in subjects:
+                self.__entity_index[subject] = {'to_be_deleted': False, 'resp_agent': resp_agent, 'source': source}
+            # Counters are read and incremented in a single round trip for the whole graph
+            self._create_preexisting_snapshots(subjects)
+
+    def _create_preexisting_snapshots(self, subjects: List[URIRef]) -> None:
+        counter_handler: CounterHandler = self.provenance.counter_handler
+        with counter_handler.batch():
+            counters: Dict[str, int] = counter_handler.read_counters(subjects)
+            new_subjects: List[URIRef] = [subject for subject in subjects if counters[str(subject)] == 0]
+            if not new_subjects:
+                return
+            new_counters: Dict[str, int] = counter_handler.increment_counters(new_subjects)
+        for subject in new_subjects:
+            new_snapshot: SnapshotEntity = self.provenance._create_snapshot(subject, self.__baseline_time, new_counters[str(subject)])
+            new_snapshot.has_description(f"The entity '{str(subject)}' has been created.")
+            self.provenance._spill_if_needed([new_snapshot])
+        self.metrics.increment('snapshots_total', len(new_subjects), kind='creation')
+
+    def _register_entity(self, subject: URIRef) -> None:
+        if subject in self.__entity_index:
+            return
+        self.__entity_index[subject] = {'to_be_deleted': False, 'resp_agent': self.__resp_agent, 'source': self.__source}
+        # In lazy mode, an entity that was already in the graph when the baseline was taken
+        # gets its creation snapshot when it is first changed, before the change is applied
+        if self.__is_lazy and next(self._get_statements((subject, None, None)), None) is not None:
+            self._create_preexisting_snapshots([subject])
 
     def merge(self: Graph|ConjunctiveGraph|OCDMGraphCommons, res: URIRef, other: URIRef):
-        triples_list: List[Tuple] = list(self.triples((None, None, other)))
-        for triple in triples_list:
-            self.remove(triple)
-            new_triple = (triple[0], triple[1], res)
-            self.add(new_triple)
-        triples_list: List[Tuple] = list(self.triples((other, None, None)))
-        for triple in triples_list:
-            self.remove(triple)
-        self.__merge_index.setdefault(res, set()).add(other)
-        self.__entity_index[other]['to_be_deleted'] = True
+        self.merge_many([(res, other)])
+
+    def merge_many(self: Graph|ConjunctiveGraph|OCDMGraphCommons, pairs: Iterable[Tuple[URIRef, URIRef]]):
+        with self.metrics.phase('merge'):
+            pairs: List[Tuple[URIRef, URIRef]] = [(res, other) for res, other in pairs if res != other]
+            for res, other in pairs:
+                self._register_entity(res)
+                self._register_entity(other)
+                if self.__merged_into.get(other) != res:
+                    self.__merge_index.setdefault(res, []).append(other)
+                    self.__merged_into[other] = res
+                self.__entity_index[other]['to_be_deleted'] = True
+            # Incoming references are found through the object position of the store and are
+            # rewritten in the context they belong to, pointing to the final survivor of each chain
+            to_remove: Dict[tuple, None] = dict()
+            to_add: Dict[tuple, None] = dict()
+            for other in dict.fromkeys(other for _, other in pairs):
+                survivor: URIRef = self.get_survivor(other)
+                for statement in self._get_statements((None, None, other)):
+                    to_remove[statement] = None
+                    if statement[0] not in self.__merged_into:
+                        to_add[(statement[0], statement[1], survivor) + statement[3:]] = None
+                for statement in self._get_statements((other, None, None)):
+                    to_remove[statement] = None
+            self._remove_statements(to_remove)
+            self._add_statements(to_add)
+
+    def _journal_addition(self, statement: tuple) -> None:
+        if not self.__is_tracking:
+            return
+        subject = statement[0]
+        self._register_entity(subject)
+        changes = self.__journal.setdefault(subject, {'additions': dict(), 'removals': dict()})
+        if statement in changes['removals']:
+            del changes['removals'][statement]
+        elif statement not in changes['additions'] and statement not in self:
+            changes['additions'][statement] = None
+
+    def _journal_additions(self, statements: Iterable[tuple]) -> None:
+        if not self.__is_tracking:
+            return
+        for statement in statements:
+            self._journal_addition(statement)
+
+    def _journal_removals(self, statements: Iterable[tuple]) -> None:
+        if not self.__is_tracking:
+            return
+        for statement in statements:
+            self._register_entity(statement[0])
+            changes = self.__journal.setdefault(statement[0], {'additions': dict(), 'removals': dict()})
+            if statement in changes['additions']:
+                del changes['additions'][statement]
+            else:
+                changes['removals'][statement] = None
+
+    def get_changes(self, subject: URIRef) -> Tuple[List[tuple], List[tuple]]:
+        changes = self.__journal.get(subject)
+        if changes is None:
+            return [], []
+        return list(changes['removals']), list(changes['additions'])
+
+    def get_dirty_subjects(self) -> List[URIRef]:
+        dirty_subjects = {subject: None for subject, changes in self.__journal.items() if changes['additions'] or changes['removals']}
+        dirty_subjects.update(dict.fromkeys(self.__merge_index))
+        return list(dirty_subjects)
+
+    def get_current_statements(self, subject: URIRef) -> Generator[tuple, None, None]:
+        return self._get_statements((subject, None, None))
+
+    @abstractmethod
+    def _get_statements(self, pattern: Tuple) -> Generator[tuple, None, None]:
+        pass
+
+    @abstractmethod
+    def _add_statements(self, statements: Iterable[tuple]) -> None:
+        pass
+
+    @abstractmethod
+    def _remove_statements(self, statements: Iterable[tuple]) -> None:
+        pass
+
+    def get_preexisting_statements(self, subject: URIRef) -> Generator[tuple, None, None]:
+        changes = self.__journal.get(subject, {'additions': dict(), 'removals': dict()})
+        for statement in self.get_current_statements(subject):
+            if statement not in changes['additions']:
+                yield statement
+        yield from changes['removals']
+
+    def get_survivor(self, res: URIRef) -> URIRef:
+        # Entities can be merged into entities that were merged in turn
+        visited = {res}
+        while res in self.__merged_into and self.__merged_into[res] not in visited:
+            res = self.__merged_into[res]
+            visited.add(res)
+        return res
 
     @property
     def merge_index(self) -> dict:
         return self.__merge_index
 
+    @property
+    def merged_into(self) -> dict:
+        return self.__merged_into
+
     @property
     def entity_index(self) -> dict:
         return self.__entity_index
     
-    def generate_provenance(self, c_time: float = None) -> None:
-        return self.provenance.generate_provenance(c_time)
+    def generate_provenance(self, c_time: float = None, sink: ProvenanceSink = None, processes: int = None) -> None:
+        return self.provenance.generate_provenance(c_time, sink, processes)
     
+    async def generate_provenance_async(self, c_time: float = None, counter_handler: AsyncCounterHandler = None, sink: ProvenanceSink = None, processes: int = None) -> None:
+        return await self.provenance.generate_provenance_async(c_time, counter_handler, sink, processes)
+
     def get_entity(self, res: str) -> Optional[ProvEntity]:
         return self.provenance.get_entity(res)
     
     def commit_changes(self):
         self.__merge_index = dict()
+        self.__merged_into = dict()
         self.__entity_index = dict()
-        self.preexisting_finished()
+        self.preexisting_finished(lazy=self.__is_lazy)
     
 class OCDMGraph(OCDMGraphCommons, Graph):
-    def __init__(self, counter_handler: CounterHandler = None):
-        Graph.__init__(self)
-        OCDMGraphCommons.__init__(self, counter_handler)
+    def __init__(self, counter_handler: CounterHandler = None, metrics: Metrics = None, max_snapshots_in_memory: int = None, store: Store|str = 'default', max_bytes_in_memory: int = None):
+        Graph.__init__(self, store=store)
+        OCDMGraphCommons.__init__(self, counter_handler, metrics, max_snapshots_in_memory, max_bytes_in_memory)
+
+    def add(self, triple: Tuple) -> OCDMGraph:
+        self._journal_addition(tuple(triple))
+        return Graph.add(self, triple)
+
+    def addN(self, quads: Iterable[Tuple]) -> OCDMGraph:
+        quads = [(s, p, o, c) for s, p, o, c in quads if isinstance(c, Graph) and c.identifier is self.identifier]
+        self._journal_additions((s, p, o) for s, p, o, _ in quads)
+        return Graph.addN(self, quads)
+
+    def remove(self, triple: Tuple) -> OCDMGraph:
+        self._journal_removals(list(self.triples(triple)))
+        return Graph.remove(self, triple)
+
+    def removeN(self, quads: Iterable[Tuple]) -> OCDMGraph:
+        triples = [(s, p, o) for s, p, o, c in quads if isinstance(c, Graph) and c.identifier is self.identifier]
+        triples = [triple for triple in dict.fromkeys(triples) if triple in self]
+        self._journal_removals(triples)
+        for triple in triples:
+            Graph.remove(self, triple)
+        return self
+
+    def _get_statements(self, pattern: Tuple) -> Generator[tuple, None, None]:
+        yield from self.triples(pattern)
+
+    def _add_statements(self, statements: Iterable[tuple]) -> None:
+        self.addN((s, p, o, self) for s, p, o in statements)
+
+    def _remove_statements(self, statements: Iterable[tuple]) -> None:
+        self.removeN((s, p, o, self) for s, p, o in statements)
 
 class OCDMConjunctiveGraph(OCDMGraphCommons, ConjunctiveGraph):
-    def __init__(self, counter_handler: CounterHandler = None):
-        ConjunctiveGraph.__init__(self)
-        OCDMGraphCommons.__init__(self, counter_handler)
\ No newline at end of file
+    def __init__(self, counter_handler: CounterHandler = None, metrics: Metrics = None, max_snapshots_in_memory: int = None, store: Store|str = 'default', max_bytes_in_memory: int = None):
+        ConjunctiveGraph.__init__(self, store=store)
+        OCDMGraphCommons.__init__(self, counter_handler, metrics, max_snapshots_in_memory, max_bytes_in_memory)
+
+    def add(self, triple_or_quad: Tuple) -> OCDMConjunctiveGraph:
+        s, p, o, c = self._spoc(triple_or_quad, default=True)
+        self._journal_addition((s, p, o, c.identifier))
+        return ConjunctiveGraph.add(self, (s, p, o, c))
+
+    def addN(self, quads: Iterable[Tuple]) -> OCDMConjunctiveGraph:
+        quads = [(s, p, o, self._graph(c)) for s, p, o, c in quads]
+        self._journal_additions((s, p, o, c.identifier) for s, p, o, c in quads)
+        return ConjunctiveGraph.addN(self, quads)
+
+    def remove(self, triple_or_quad: Tuple) -> OCDMConjunctiveGraph:
+        self._journal_removals([(s, p, o, c.identifier) for s, p, o, c in self.quads(triple_or_quad)])
+        return ConjunctiveGraph.remove(self, triple_or_quad)
+
+    def removeN(self, quads: Iterable[Tuple]) -> OCDMConjunctiveGraph:
+        quads = [(s, p, o, self._graph(c)) for s, p, o, c in quads]
+        quads = {(s, p, o, c.identifier): c for s, p, o, c in quads}
+        quads = {statement: c for statement, c in quads.items() if (*statement[:3], c) in self}
+        self._journal_removals(quads)
+        for (s, p, o, _), c in quads.items():
+            ConjunctiveGraph.remove(self, (s, p, o, c))
+        return self
+
+    def _get_statements(self, pattern: Tuple) -> Generator[tuple, None, None]:
+        for s, p, o, c in self.quads(pattern):
+            yield s, p, o, c.identifier
+
+    def _add_statements(self, statements: Iterable[tuple]) -> None:
+        self.addN(statements)
+
+    def _remove_statements(self, statements: Iterable[tuple]) -> None:
+        self.removeN(statements)
\ No newline at end of file
@@ -0,0 +1,224 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+    from rdflib.term import Node
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from rdflib import PROV, ConjunctiveGraph, Graph, Namespace, URIRef
+from rdflib.plugins.sparql.algebra import translateUpdate
+from rdflib.plugins.sparql.parser import parseUpdate
+
+from support import get_prov_count
+
+OCO = Namespace("https://w3id.org/oc/ontology/")
+
+
+class SnapshotDelta(object):
+    """A snapshot of an entity, with the statements that its update query removed and added."""
+
+    __slots__ = ('res', 'number', 'generation_time', 'invalidation_time', 'removed', 'added')
+
+    def __init__(self, res: URIRef, number: int, generation_time: Optional[datetime], invalidation_time: Optional[datetime], removed: FrozenSet[Tuple[Node, Node, Node]], added: FrozenSet[Tuple[Node, Node, Node]]) -> None:
+        self.res: URIRef = res
+        self.number: int = number
+        self.generation_time: Optional[datetime] = generation_time
+        self.invalidation_time: Optional[datetime] = invalidation_time
+        self.removed: FrozenSet[Tuple[Node, Node, Node]] = removed
+        self.added: FrozenSet[Tuple[Node, Node, Node]] = added
+
+
+class EntityHistory(object):
+    """It reconstructs the state of an entity at any time, starting from its current state
+    and replaying backwards the update queries recorded by its snapshots.
+
+    The snapshots of an entity are read and their update queries parsed only once. When a
+    checkpoint interval K is given, the state after every K-th snapshot is materialized the
+    first time the history of the entity is read, so that any other state is at most K/2
+    deltas away from a known one. Reconstructed states and entity histories are kept in
+    two caches with LRU eviction."""
+
+    def __init__(self, current_graph: Graph|ConjunctiveGraph, provenance_graph: Graph|ConjunctiveGraph, checkpoint_interval: int = None, cache_size: int = 128) -> None:
+        """
+        Constructor of the ``EntityHistory`` class.
+
+        :param current_graph: The graph holding the current state of the entities, e.g. an ``OCDMConjunctiveGraph``
+        :type current_graph: Graph|ConjunctiveGraph
+        :param provenance_graph: The graph holding the snapshots, e.g. the result of ``OCDMProvenance.to_dataset``
+        :type provenance_graph: Graph|ConjunctiveGraph
+        :param checkpoint_interval: The number of snapshots between two materialized states (defaults to no checkpoint but the current state)
+        :type checkpoint_interval: int, optional
+        :param cache_size: The maximum number of entity histories, and of reconstructed states, kept in memory (defaults to 128)
+        :type cache_size: int, optional
+        :raises ValueError: if the checkpoint interval or the cache size is not positive.
+        """
+        if checkpoint_interval is not None and checkpoint_interval <= 0:
+            raise ValueError("The checkpoint interval must be a positive number")
+        if cache_size <= 0:
+            raise ValueError("The cache size must be a positive number")
+        self.current_graph: Graph|ConjunctiveGraph = current_graph
+        self.provenance_graph: Graph|ConjunctiveGraph = provenance_graph
+        self.checkpoint_interval: Optional[int] = checkpoint_interval
+        self.cache_size: int = cache_size
+        self._histories: OrderedDict[URIRef, Tuple[List[SnapshotDelta], Dict[int, FrozenSet[Tuple[Node, Node, Node]]]]] = OrderedDict()
+        self._states: OrderedDict[Tuple[URIRef, int], FrozenSet[Tuple[Node, Node, Node]]] = OrderedDict()
+
+    def get_snapshots(self, entity: URIRef) -> List[SnapshotDelta]:
+        """
+        It returns the snapshots of an entity, sorted by number.
+
+        :param entity: The entity
+        :type entity: URIRef
+        :return: The snapshots, with the statements removed and added by each of them.
+        """
+        return list(self._get_history(entity)[0])
+
+    def get_state(self, entity: URIRef, number: int) -> Graph:
+        """
+        It reconstructs the state of an entity right after one of its snapshots.
+
+        :param entity: The entity
+        :type entity: URIRef
+        :param number: The number of the snapshot, e.g. 1 for the creation snapshot
+        :type number: int
+        :raises ValueError: if the entity has no snapshot with that number.
+        :return: A graph with the statements about the entity.
+        """
+        snapshots, _ = self._get_history(entity)
+        for index, snapshot in enumerate(snapshots):
+            if snapshot.number == number:
+                return _to_graph(self._get_state(entity, index))
+        raise ValueError(f"The entity '{entity}' has no snapshot number {number}")
+
+    def get_state_at(self, entity: URIRef, time: datetime|str|float) -> Optional[Graph]:
+        """
+        It reconstructs the state of an entity at a given time, i.e. the state after the
+        last snapshot generated at that time or before.
+
+        :param entity: The entity
+        :type entity: URIRef
+        :param time: A datetime, an ISO 8601 string or a POSIX timestamp. Naive datetimes are considered UTC
+        :type time: datetime|str|float
+        :return: A graph with the statements about the entity, or None if the entity did not exist yet.
+        """
+        time = _to_datetime(time)
+        snapshots, _ = self._get_history(entity)
+        index: int = -1
+        for cur_index, snapshot in enumerate(snapshots):
+            if snapshot.generation_time is not None and snapshot.generation_time <= time:
+                index = cur_index
+        if index < 0:
+            return None
+        return _to_graph(self._get_state(entity, index))
+
+    def clear_cache(self) -> None:
+        """
+        It forgets every entity history, checkpoint and reconstructed state, e.g. after the
+        current graph or the provenance graph have changed.
+
+        :return: None
+        """
+        self._histories.clear()
+        self._states.clear()
+
+    def _get_state(self, entity: URIRef, index: int) -> FrozenSet[Tuple[Node, Node, Node]]:
+        key = (entity, index)
+        if key in self._states:
+            self._states.move_to_end(key)
+            return self._states[key]
+        snapshots, checkpoints = self._get_history(entity)
+        start: int = min(checkpoints, key=lambda checkpoint: abs(checkpoint - index))
+        state: Set[Tuple[Node, Node, Node]] = set(checkpoints[start])
+        # Deltas are undone when going back in time and applied when going forward
+        for cur_index in range(start, index, -1):
+            state.difference_update(snapshots[cur_index].added)
+            state.update(snapshots[cur_index].removed)
+        for cur_index in range(start + 1, index + 1):
+            state.difference_update(snapshots[cur_index].removed)
+            state.update(snapshots[cur_index].added)
+        return self._cache(self._states, key, frozenset(state))
+
+    def _get_history(self, entity: URIRef) -> Tuple[List[SnapshotDelta], Dict[int, FrozenSet[Tuple[Node, Node, Node]]]]:
+        if entity in self._histories:
+            self._histories.move_to_end(entity)
+            return self._histories[entity]
+        snapshots: List[SnapshotDelta] = sorted(
+            (self._get_snapshot_delta(entity, snapshot) for snapshot in self.provenance_graph.subjects(PROV.specializationOf, entity, unique=True)),
+            key=lambda snapshot: snapshot.number)
+        state: Set[Tuple[Node, Node, Node]] = set(self.current_graph.triples((entity, None, None)))
+        checkpoints: Dict[int, FrozenSet[Tuple[Node, Node, Node]]] = dict()
+        if snapshots:
+            last_index: int = len(snapshots) - 1
+            checkpoints[last_index] = frozenset(state)
+            if self.checkpoint_interval is not None:
+                for index in range(last_index, 0, -1):
+                    state.difference_update(snapshots[index].added)
+                    state.update(snapshots[index].removed)
+                    if (index - 1) % self.checkpoint_interval == 0:
+                        checkpoints[index - 1] = frozenset(state)
+        return self._cache(self._histories, entity, (snapshots, checkpoints))
+
+    def _get_snapshot_delta(self, entity: URIRef, snapshot: URIRef) -> SnapshotDelta:
+        removed: Set[Tuple[Node, Node, Node]] = set()
+        added: Set[Tuple[Node, Node, Node]] = set()
+        for update_query in self.provenance_graph.objects(snapshot, OCO.hasUpdateQuery):
+            for request in translateUpdate(parseUpdate(str(update_query))).algebra:
+                if request.name == 'DeleteData':
+                    statements = removed
+                elif request.name == 'InsertData':
+                    statements = added
+                else:
+                    continue
+                triples = list(request.get('triples') or [])
+                for graph_triples in (request.get('quads') or dict()).values():
+                    triples.extend(graph_triples)
+                statements.update(triple for triple in triples if triple[0] == entity)
+        return SnapshotDelta(snapshot, int(get_prov_count(snapshot)),
+                             self._get_time(snapshot, PROV.generatedAtTime), self._get_time(snapshot, PROV.invalidatedAtTime),
+                             frozenset(removed), frozenset(added))
+
+    def _get_time(self, snapshot: URIRef, predicate: URIRef) -> Optional[datetime]:
+        value = self.provenance_graph.value(snapshot, predicate)
+        return None if value is None else _to_datetime(str(value))
+
+    def _cache(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+
+def _to_datetime(time: datetime|str|float) -> datetime:
+    if isinstance(time, (int, float)):
+        return datetime.fromtimestamp(time, tz=timezone.utc)
+    if isinstance(time, str):
+        time = datetime.fromisoformat(time.replace('Z', '+00:00'))
+    return time if time.tzinfo is not None else time.replace(tzinfo=timezone.utc)
+
+
+def _to_graph(state: FrozenSet[Tuple[Node, Node, Node]]) -> Graph:
+    graph = Graph()
+    for triple in state:
+        graph.add(triple)
+    return graph
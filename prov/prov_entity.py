@@ -18,15 +18,19 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from rdflib import Graph, Namespace, URIRef
+from oc_ocdm.support.support import is_string_empty
+from rdflib import RDF, RDFS, XSD, Graph, Literal, Namespace, URIRef
 
 if TYPE_CHECKING:
     from prov.provenance import OCDMProvenance
 
 from abstract_entity import AbstractEntity
+from prov.snapshot_record import SnapshotRecord
 
 if TYPE_CHECKING:
-    from typing import ClassVar, Dict
+    from typing import ClassVar, Dict, Generator, Iterable, List, Optional, Tuple
+
+    from rdflib.term import Node
 
 
 class ProvEntity(AbstractEntity):
@@ -55,11 +59,63 @@ class ProvEntity(AbstractEntity):
     }
 
     def __init__(self, prov_subject: str, p_set: OCDMProvenance, count: str) -> None:
-        super(ProvEntity, self).__init__()
-        self.g: Graph = Graph()
+        # The statements are kept in a compact record, while the graph is materialized on demand
+        self.record: SnapshotRecord = SnapshotRecord(URIRef(prov_subject + '/prov/se/' + count))
         self.prov_subject = prov_subject
-        self.res = URIRef(prov_subject + '/prov/se/' + count)
         self.p_set: OCDMProvenance = p_set
         self._create_type(ProvEntity.iri_entity)
         if str(self.res) not in p_set.res_to_entity:
-            p_set.res_to_entity[str(self.res)] = self
\ No newline at end of file
+            p_set.res_to_entity[str(self.res)] = self
+
+    @property
+    def res(self) -> URIRef:
+        return self.record.res
+
+    @property
+    def g(self) -> Graph:
+        """
+        A graph containing the triples of the entity. It is built every time it is requested,
+        hence changes to the returned graph are not reflected by the entity.
+        """
+        return self.record.to_graph()
+
+    def triples(self) -> Generator[Tuple[URIRef, URIRef, Node], None, None]:
+        """
+        It produces the triples of the entity without building a graph.
+
+        :return: A generator of triples
+        """
+        return self.record.triples()
+
+    def remove_every_triple(self) -> None:
+        self.record.remove()
+
+    def remove_label(self) -> None:
+        self.record.remove(RDFS.label)
+
+    def remove_type(self) -> None:
+        self.record.remove(RDF.type)
+
+    def add_triples(self, iterable_of_triples: Iterable) -> None:
+        for s, p, o in iterable_of_triples:
+            if s == self.res:
+                self.record.add(p, o)
+
+    def _create_literal(self, p: URIRef, s: str, dt: URIRef = None, nor: bool = True) -> None:
+        if not is_string_empty(s):
+            self.record.add(p, Literal(s, datatype=dt if dt is not None else XSD.string, normalize=nor))
+
+    def _create_type(self, res_type: URIRef) -> None:
+        self.record.add(RDF.type, res_type)
+
+    def _get_literal(self, predicate: URIRef) -> Optional[str]:
+        return next((str(o) for o in self.record.objects(predicate) if type(o) == Literal), None)
+
+    def _get_multiple_literals(self, predicate: URIRef) -> List[str]:
+        return [str(o) for o in self.record.objects(predicate) if type(o) == Literal]
+
+    def _get_uri_reference(self, predicate: URIRef) -> Optional[URIRef]:
+        return next((o for o in self.record.objects(predicate) if type(o) == URIRef), None)
+
+    def _get_multiple_uri_references(self, predicate: URIRef) -> List[URIRef]:
+        return [o for o in self.record.objects(predicate) if type(o) == URIRef]
@@ -19,69 +19,284 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from counter_handler.async_counter_handler import AsyncCounterHandler
     from ocdm_graph import OCDMConjunctiveGraph, OCDMGraph
-    from typing import List, Dict, Optional
+    from prov.provenance_sink import ProvenanceSink
+    from typing import Dict, Generator, Iterable, Iterator, List, Optional, Set, Tuple
 
-from collections import OrderedDict
+    from rdflib.term import Node
+
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from itertools import chain, islice
 
 from rdflib import ConjunctiveGraph, Graph, URIRef
 
+from counter_handler.async_counter_handler import ExecutorCounterHandler
 from counter_handler.counter_handler import CounterHandler
 from counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from metrics import SIZE_BUCKETS, InstrumentedCounterHandler, Metrics, NullMetrics
+from nt_writer import get_nq_row
 from prov.prov_entity import ProvEntity
+from prov.provenance_sink import NQuadsSpool
 from prov.snapshot_entity import SnapshotEntity
-from query_utils import get_update_query
+from query_utils import get_batched_update_queries, get_changes_query
 from support import get_prov_count
 
+# The estimated memory footprint of a snapshot record, apart from its update query and description
+SNAPSHOT_BYTES: int = 1024
+# In the parallel mode, the subjects sent to a worker at once and those planned
+# between two checks of the memory budget
+WORKER_CHUNK_SIZE: int = 64
+WORKER_BLOCK_SIZE: int = 4096
+
 
 class OCDMProvenance(object):
-    def __init__(self, prov_subj_graph: OCDMConjunctiveGraph|OCDMGraph, counter_handler: CounterHandler = None):
+    def __init__(self, prov_subj_graph: OCDMConjunctiveGraph|OCDMGraph, counter_handler: CounterHandler = None, metrics: Metrics = None, max_snapshots_in_memory: int = None, spool_dir: str = None, max_bytes_in_memory: int = None):
         self.prov_g = prov_subj_graph
         # The following variable maps a URIRef with the related provenance entity
         self.res_to_entity: Dict[str, ProvEntity] = dict()
+        # Beyond either budget, finished snapshots are spilled to a temporary N-Quads file,
+        # which the exports read back as a stream. Update queries can be of any size,
+        # hence the byte budget also bounds how many of them are computed at once
+        self.max_snapshots_in_memory: Optional[int] = max_snapshots_in_memory
+        self.max_bytes_in_memory: Optional[int] = max_bytes_in_memory
+        self.spool_dir: Optional[str] = spool_dir
+        self.spool: Optional[NQuadsSpool] = None
+        self._bytes_in_memory: int = 0
+        # The snapshots in memory whose footprint is already part of the estimate
+        self._counted_snapshots: Set[str] = set()
         if counter_handler is None:
             counter_handler = InMemoryCounterHandler()
+        self.metrics: Metrics = NullMetrics() if metrics is None else metrics
+        if self.metrics.enabled:
+            counter_handler = InstrumentedCounterHandler(counter_handler, self.metrics)
         self.counter_handler = counter_handler
 
-    def generate_provenance(self, c_time: float = None) -> None:
+    def generate_provenance(self, c_time: float = None, sink: ProvenanceSink = None, processes: int = None) -> None:
+        cur_time: str = self._get_cur_time(c_time)
+        with self.metrics.phase('plan'):
+            prov_g_subjects, merged_entities = self._get_subjects_to_process()
+            # Every counter needed by this batch is read in a single round trip
+            counters: Dict[str, int] = self.counter_handler.read_counters(chain(prov_g_subjects, merged_entities))
+        executor: Optional[ProcessPoolExecutor] = self._get_executor(processes)
+        try:
+            # Subjects are processed in chunks that fit the memory budget, each of which
+            # is planned, minted and built before the update queries of the next are computed
+            subjects: Iterator[URIRef] = iter(prov_g_subjects)
+            while True:
+                with self.metrics.phase('plan'):
+                    changes = self._get_changes_to_record(subjects, counters, executor)
+                if not changes:
+                    break
+                # New snapshot numbers are minted by the counter handler, which keeps them unique
+                # even when other processes are generating provenance against the same counters
+                with self.metrics.phase('mint'), self.counter_handler.batch():
+                    new_counters: Dict[str, int] = self.counter_handler.increment_counters(cur_subj for cur_subj, _, _, _ in changes)
+                self._build_all_snapshots(changes, cur_time, counters, new_counters, sink)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    async def generate_provenance_async(self, c_time: float = None, counter_handler: AsyncCounterHandler = None, sink: ProvenanceSink = None, processes: int = None) -> None:
+        """Only the counter I/O is non-blocking: planning the changes and building the snapshots
+        work on the graph, hence they still run in the thread of the event loop."""
+        cur_time: str = self._get_cur_time(c_time)
+        # Unless an asynchronous counter handler is provided, the counter I/O of the
+        # synchronous one runs in an executor, without blocking the event loop
+        adapter: Optional[ExecutorCounterHandler] = None
+        if counter_handler is None:
+            adapter = counter_handler = ExecutorCounterHandler(self.counter_handler)
+        executor: Optional[ProcessPoolExecutor] = self._get_executor(processes)
+        try:
+            with self.metrics.phase('plan'):
+                prov_g_subjects, merged_entities = self._get_subjects_to_process()
+                counters: Dict[str, int] = await counter_handler.read_counters(chain(prov_g_subjects, merged_entities))
+            subjects: Iterator[URIRef] = iter(prov_g_subjects)
+            while True:
+                with self.metrics.phase('plan'):
+                    changes = self._get_changes_to_record(subjects, counters, executor)
+                if not changes:
+                    break
+                with self.metrics.phase('mint'):
+                    async with counter_handler.batch():
+                        new_counters: Dict[str, int] = await counter_handler.increment_counters([cur_subj for cur_subj, _, _, _ in changes])
+                self._build_all_snapshots(changes, cur_time, counters, new_counters, sink)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if adapter is not None:
+                adapter.close()
+
+    @staticmethod
+    def _get_cur_time(c_time: float = None) -> str:
         if c_time is None:
-            cur_time: str = datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
-        else:
-            cur_time: str = datetime.fromtimestamp(c_time, tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
+            return datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
+        return datetime.fromtimestamp(c_time, tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
+
+    def _get_subjects_to_process(self) -> Tuple[List[URIRef], List[URIRef]]:
         merge_index = self.prov_g.merge_index
-        prov_g_subjects = OrderedDict(sorted(self.prov_g.entity_index.items(), key=lambda x: not x[1]['to_be_deleted'], reverse=True))
-        for cur_subj in prov_g_subjects:
-            last_snapshot_res: Optional[URIRef] = self._retrieve_last_snapshot(str(cur_subj))
-            if last_snapshot_res is None:
-                # CREATION SNAPSHOT
-                cur_snapshot: SnapshotEntity = self._create_snapshot(cur_subj, cur_time)
-                cur_snapshot.has_description(f"The entity '{str(cur_subj)}' has been created.")
-            else:
-                update_query = get_update_query(
-                    self._generate_subj_graph(self.prov_g.preexisting_graph, cur_subj), 
-                    self._generate_subj_graph(self.prov_g, cur_subj))[0]
-                cur_subj_merge_index = {k: v for k, v in merge_index.items() if k == cur_subj}
-                snapshots_list = self._get_snapshots_from_merge_list(cur_subj_merge_index)
-                if update_query and len(snapshots_list) == 0:
-                    # MODIFICATION SNAPSHOT
-                    last_snapshot: SnapshotEntity = self.add_se(prov_subject=cur_subj, res=last_snapshot_res)
-                    last_snapshot.has_invalidation_time(cur_time)
-                    cur_snapshot: SnapshotEntity = self._create_snapshot(cur_subj, cur_time)
-                    cur_snapshot.derives_from(last_snapshot)
-                    cur_snapshot.has_description(f"The entity '{str(cur_subj)}' was modified.")
-                    cur_snapshot.has_update_action(update_query)
-                elif len(snapshots_list) > 0:
-                    # MERGE SNAPSHOT
-                    last_snapshot: SnapshotEntity = self.add_se(prov_subject=cur_subj, res=last_snapshot_res)
-                    last_snapshot.has_invalidation_time(cur_time)
-                    cur_snapshot: SnapshotEntity = self._create_snapshot(cur_subj, cur_time)
-                    cur_snapshot.derives_from(last_snapshot)
-                    for snapshot in snapshots_list:
-                        cur_snapshot.derives_from(snapshot)
-                    if update_query:
-                        cur_snapshot.has_update_action(update_query)
-                    cur_snapshot.has_description(self._get_merge_description(cur_subj, snapshots_list))
+        entity_index = self.prov_g.entity_index
+        prov_g_subjects = sorted(self.prov_g.get_dirty_subjects(), key=lambda x: not entity_index[x]['to_be_deleted'], reverse=True)
+        merged_entities = [merged for cur_subj in prov_g_subjects for merged in merge_index.get(cur_subj, ())]
+        return prov_g_subjects, merged_entities
+
+    def _get_executor(self, processes: int = None) -> Optional[ProcessPoolExecutor]:
+        # Workers are forked, hence they share the graph and its journal with this process and
+        # receive nothing but the subjects. Where forking is not available, the serial mode is used
+        if processes is None or processes <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            return None
+        return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork'), initializer=_set_worker_provenance, initargs=(self,))
+
+    def _get_changes_to_record(self, subjects: Iterator[URIRef], counters: Dict[str, int], executor: ProcessPoolExecutor = None) -> List[Tuple[URIRef, bool, str, List[URIRef]]]:
+        # It consumes the subjects until the changes exceed the memory budget,
+        # hence an empty list means that every subject has been processed.
+        # The workers of the executor, if any, are given blocks of subjects at once
+        merge_index = self.prov_g.merge_index
+        block_size: int = 1 if executor is None else WORKER_BLOCK_SIZE
+        changes: List[Tuple[URIRef, bool, str, List[URIRef]]] = []
+        num_of_bytes: int = 0
+        with self.metrics.phase('update_queries'):
+            while not self._is_over_budget(len(changes), num_of_bytes + SNAPSHOT_BYTES * len(changes)):
+                block: List[URIRef] = list(islice(subjects, block_size))
+                if not block:
+                    break
+                update_queries: Dict[URIRef, str] = self._get_update_queries([cur_subj for cur_subj in block if counters[str(cur_subj)] > 0], executor)
+                for cur_subj in block:
+                    if counters[str(cur_subj)] <= 0:
+                        changes.append((cur_subj, True, "", []))
+                        continue
+                    update_query = update_queries[cur_subj]
+                    merged_list = [merged for merged in merge_index.get(cur_subj, ()) if counters[str(merged)] > 0]
+                    if update_query or merged_list:
+                        changes.append((cur_subj, False, update_query, merged_list))
+                        num_of_bytes += sys.getsizeof(update_query)
+        return changes
+
+    def _get_update_queries(self, subjects: List[URIRef], executor: ProcessPoolExecutor = None) -> Dict[URIRef, str]:
+        if executor is None:
+            return {subj: self._get_update_query(subj) for subj in subjects}
+        update_queries: Dict[URIRef, str] = dict()
+        # The results come back in the order of the subjects, hence the output is the same as in the serial mode
+        for subj, (update_query, num_of_statements) in zip(subjects, executor.map(_get_update_query_in_worker, subjects, chunksize=WORKER_CHUNK_SIZE)):
+            self.metrics.observe('diff_statements', num_of_statements, SIZE_BUCKETS)
+            update_queries[subj] = update_query
+        return update_queries
+
+    def _build_all_snapshots(self, changes: List[Tuple[URIRef, bool, str, List[URIRef]]], cur_time: str, counters: Dict[str, int], new_counters: Dict[str, int], sink: ProvenanceSink = None) -> None:
+        with self.metrics.phase('build'):
+            if sink is not None:
+                self._drain(sink)
+            for cur_subj, is_creation, update_query, merged_list in changes:
+                snapshots = self._build_snapshots(cur_subj, is_creation, update_query, merged_list, cur_time, counters, new_counters[str(cur_subj)])
+                if sink is not None:
+                    self._drain(sink)
+                else:
+                    self._spill_if_needed(snapshots)
+
+    def _build_snapshots(self, cur_subj: URIRef, is_creation: bool, update_query: str, merged_list: List[URIRef], cur_time: str, counters: Dict[str, int], cur_snapshot_count: int) -> List[SnapshotEntity]:
+        if is_creation:
+            # CREATION SNAPSHOT
+            cur_snapshot: SnapshotEntity = self._create_snapshot(cur_subj, cur_time, cur_snapshot_count)
+            cur_snapshot.has_description(f"The entity '{str(cur_subj)}' has been created.")
+            self.metrics.increment('snapshots_total', kind='creation')
+            return [cur_snapshot]
+        # Leased counters can leave gaps, hence the last snapshot is the one counted before minting
+        last_snapshot: SnapshotEntity = self._get_snapshot(cur_subj, counters[str(cur_subj)])
+        last_snapshot.has_invalidation_time(cur_time)
+        cur_snapshot: SnapshotEntity = self._create_snapshot(cur_subj, cur_time, cur_snapshot_count)
+        cur_snapshot.derives_from(last_snapshot)
+        if not merged_list:
+            # MODIFICATION SNAPSHOT
+            cur_snapshot.has_description(f"The entity '{str(cur_subj)}' was modified.")
+            cur_snapshot.has_update_action(update_query)
+            self.metrics.increment('snapshots_total', kind='modification')
+            return [last_snapshot, cur_snapshot]
+        else:
+            # MERGE SNAPSHOT
+            snapshots_list = self._get_snapshots_from_merge_list(merged_list, counters)
+            for snapshot in snapshots_list:
+                cur_snapshot.derives_from(snapshot)
+            if update_query:
+                cur_snapshot.has_update_action(update_query)
+            cur_snapshot.has_description(self._get_merge_description(cur_subj, snapshots_list))
+            self.metrics.increment('snapshots_total', kind='merge')
+            return [last_snapshot, cur_snapshot] + snapshots_list
+
+    def _drain(self, sink: ProvenanceSink) -> None:
+        # Snapshots of earlier snapshots that are touched again are rebuilt from their IRIs,
+        # hence only the new statements about them are written, e.g. the invalidation time
+        with self.metrics.phase('sink'):
+            if self.spool is not None and sink is not self.spool:
+                sink.write(self.spool.read())
+                self.close()
+            for entity in self.res_to_entity.values():
+                sink.write(self._get_entity_quads(entity))
+            self.res_to_entity.clear()
+            self._bytes_in_memory = 0
+            self._counted_snapshots.clear()
+
+    def _spill_if_needed(self, snapshots: List[SnapshotEntity]) -> None:
+        # Snapshots are spilled only between subjects, when none of them is half-built.
+        # Their footprint is estimated from the strings they hold, since update queries and
+        # descriptions are the only statements whose size is unbounded
+        for snapshot in snapshots:
+            record = snapshot.record
+            # A snapshot touched again, e.g. when it is invalidated, is counted once
+            if str(record.res) in self._counted_snapshots:
+                continue
+            self._counted_snapshots.add(str(record.res))
+            self._bytes_in_memory += SNAPSHOT_BYTES + sum(sys.getsizeof(value) for value in (record.update_query, record.description) if value is not None)
+        if not self._is_over_budget(len(self.res_to_entity), self._bytes_in_memory):
+            return
+        if self.spool is None:
+            self.spool = NQuadsSpool(self.spool_dir)
+        self.metrics.increment('spilled_snapshots_total', len(self.res_to_entity))
+        self._drain(self.spool)
+
+    def _is_over_budget(self, num_of_snapshots: int, num_of_bytes: int) -> bool:
+        return (self.max_snapshots_in_memory is not None and num_of_snapshots > self.max_snapshots_in_memory) \
+            or (self.max_bytes_in_memory is not None and num_of_bytes > self.max_bytes_in_memory)
+
+    def close(self) -> None:
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+    @staticmethod
+    def _get_entity_quads(entity: ProvEntity) -> Generator[Tuple[Node, Node, Node, URIRef], None, None]:
+        prov_graph_iri = URIRef(entity.prov_subject + '/prov/')
+        for s, p, o in entity.triples():
+            yield s, p, o, prov_graph_iri
+
+    def get_quads(self) -> Generator[Tuple[Node, Node, Node, URIRef], None, None]:
+        if self.spool is not None:
+            yield from self.spool.read()
+        for entity in self.res_to_entity.values():
+            yield from self._get_entity_quads(entity)
+
+    def to_dataset(self) -> ConjunctiveGraph:
+        dataset = ConjunctiveGraph()
+        contexts: Dict[URIRef, Graph] = dict()
+        quads = []
+        for s, p, o, prov_graph_iri in self.get_quads():
+            if prov_graph_iri not in contexts:
+                contexts[prov_graph_iri] = dataset.get_context(prov_graph_iri)
+            quads.append((s, p, o, contexts[prov_graph_iri]))
+        dataset.addN(quads)
+        return dataset
+
+    def serialize(self, destination: str = None, format: str = 'nquads', **kwargs) -> Optional[str]:
+        if format not in {'nquads', 'nq'}:
+            return self.to_dataset().serialize(destination=destination, format=format, **kwargs)
+        # N-Quads are written straight from the snapshot records
+        rows = (get_nq_row(quad) for quad in self.get_quads())
+        if destination is None:
+            return ''.join(rows)
+        with open(destination, 'w', encoding='utf8') as f:
+            f.writelines(rows)
 
     @staticmethod
     def _get_merge_description(cur_subj: URIRef, snapshots_list: List[SnapshotEntity]) -> str:
@@ -96,25 +311,55 @@ class OCDMProvenance(object):
         merge_description += "."
         return merge_description
             
-    def _retrieve_last_snapshot(self, prov_subject: URIRef) -> Optional[URIRef]:
-        last_snapshot_count: str = str(self.counter_handler.read_counter(str(prov_subject)))
-        if int(last_snapshot_count) <= 0:
-            return None
+    def _get_snapshot(self, prov_subject: URIRef, count: int) -> SnapshotEntity:
+        # The counter is already known, hence there is no need to ask the counter handler
+        res: str = str(prov_subject) + '/prov/se/' + str(count)
+        if res in self.res_to_entity:
+            return self.res_to_entity[res]
+        return SnapshotEntity(str(prov_subject), self, str(count))
+
+    def _get_update_query(self, subj: URIRef) -> str:
+        removed, added, graph_iri = self._get_update_query_arguments(subj)
+        self.metrics.observe('diff_statements', len(removed) + len(added), SIZE_BUCKETS)
+        return get_changes_query(removed, added, graph_iri)[0]
+
+    def _get_update_query_arguments(self, subj: URIRef) -> Tuple[List[tuple], List[tuple], Optional[URIRef]]:
+        removed, added = self.prov_g.get_changes(subj)
+        graph_iri: Optional[URIRef] = None
+        if isinstance(self.prov_g, ConjunctiveGraph):
+            # Every statement about an entity belongs to the named graph of the entity
+            default_graph_iri = self.prov_g.default_context.identifier
+            for statement in chain(removed, self.prov_g.get_current_statements(subj), added):
+                if statement[3] != default_graph_iri:
+                    graph_iri = statement[3]
+                    break
+        return removed, added, graph_iri
+
+    def get_update_queries(self, max_statements: int = None, max_bytes: int = None, include_provenance: bool = True) -> Generator[str, None, None]:
+        # The changes of each subject are computed once, since every deletion is sent before any insertion
+        removed: List[tuple] = []
+        added: List[tuple] = []
+        for subj in self.prov_g.get_dirty_subjects():
+            subj_removed, subj_added = self._get_statement_changes(subj)
+            removed.extend(subj_removed)
+            added.extend(subj_added)
+        statements_to_add: Iterable[tuple] = chain(added, self.get_quads()) if include_provenance else added
+        return get_batched_update_queries(removed, statements_to_add, max_statements, max_bytes)
+
+    def _get_statement_changes(self, subj: URIRef) -> Tuple[List[tuple], List[tuple]]:
+        removed, added, graph_iri = self._get_update_query_arguments(subj)
+        self.metrics.observe('diff_statements', len(removed) + len(added), SIZE_BUCKETS)
+        removed_triples: Dict[tuple, None] = dict.fromkeys(statement[:3] for statement in removed)
+        added_triples: Dict[tuple, None] = dict.fromkeys(statement[:3] for statement in added)
+        # Statements that only moved between contexts of the same named graph are left untouched
+        return [triple + (graph_iri,) for triple in removed_triples if triple not in added_triples], \
+            [triple + (graph_iri,) for triple in added_triples if triple not in removed_triples]
+
+    def _create_snapshot(self, cur_subj: URIRef, cur_time: str, count: int = None) -> SnapshotEntity:
+        if count is None:
+            new_snapshot: SnapshotEntity = self.add_se(prov_subject=cur_subj)
         else:
-            return URIRef(str(prov_subject) + '/prov/se/' + last_snapshot_count)
-
-    def _generate_subj_graph(self, graph: ConjunctiveGraph|Graph, subj: URIRef) -> ConjunctiveGraph|Graph:
-        subj_graph: ConjunctiveGraph|Graph = ConjunctiveGraph() if isinstance(graph, ConjunctiveGraph) else Graph()
-        if isinstance(graph, ConjunctiveGraph):
-            for quad in graph.quads((subj, None, None, None)):
-                subj_graph.add(quad)
-        elif isinstance(graph, Graph):
-            for triple in graph.triples((subj, None, None)):
-                subj_graph.add(triple)
-        return subj_graph
-
-    def _create_snapshot(self, cur_subj: URIRef, cur_time: str) -> SnapshotEntity:
-        new_snapshot: SnapshotEntity = self.add_se(prov_subject=cur_subj)
+            new_snapshot: SnapshotEntity = self._get_snapshot(cur_subj, count)
         new_snapshot.is_snapshot_of(cur_subj)
         new_snapshot.has_generation_time(cur_time)
         source = self.prov_g.entity_index[cur_subj]['source']
@@ -125,18 +370,17 @@ class OCDMProvenance(object):
             new_snapshot.has_resp_agent(URIRef(resp_agent))
         return new_snapshot
     
-    def _get_snapshots_from_merge_list(self, cur_subj_merge_index: dict) -> List[SnapshotEntity]:
+    def _get_snapshots_from_merge_list(self, merge_entities: Iterable[URIRef], counters: Dict[str, int]) -> List[SnapshotEntity]:
         snapshots_list: List[SnapshotEntity] = []
-        for _, merge_entities in cur_subj_merge_index.items():
-            for merge_entity in merge_entities:
-                last_entity_snapshot_res: Optional[URIRef] = self._retrieve_last_snapshot(merge_entity)
-                if last_entity_snapshot_res is not None:
-                    snapshots_list.append(self.add_se(prov_subject=merge_entity, res=last_entity_snapshot_res))
+        for merge_entity in merge_entities:
+            last_entity_snapshot_count: int = counters[str(merge_entity)]
+            if last_entity_snapshot_count > 0:
+                snapshots_list.append(self._get_snapshot(merge_entity, last_entity_snapshot_count))
         return snapshots_list
 
     def add_se(self, prov_subject: URIRef, res: URIRef = None) -> SnapshotEntity:
-        if res is not None and res in self.res_to_entity:
-            return self.res_to_entity[res]
+        if res is not None and str(res) in self.res_to_entity:
+            return self.res_to_entity[str(res)]
         count = self._add_prov(str(prov_subject), res)
         se = SnapshotEntity(str(prov_subject), self, count)
         return se
@@ -150,5 +394,20 @@ class OCDMProvenance(object):
         return str(self.counter_handler.increment_counter(prov_subject))
 
     def get_entity(self, res: str) -> Optional[ProvEntity]:
+        # Spilled snapshots are only available through get_quads and the exports
         if res in self.res_to_entity:
-            return self.res_to_entity[res]
\ No newline at end of file
+            return self.res_to_entity[res]
+
+
+# The provenance of the forked workers, inherited from the parent process rather than pickled
+_worker_provenance: Optional[OCDMProvenance] = None
+
+
+def _set_worker_provenance(provenance: OCDMProvenance) -> None:
+    global _worker_provenance
+    _worker_provenance = provenance
+
+
+def _get_update_query_in_worker(subj: URIRef) -> Tuple[str, int]:
+    removed, added, graph_iri = _worker_provenance._get_update_query_arguments(subj)
+    return get_changes_query(removed, added, graph_iri)[0], len(removed) + len(added)
@@ -0,0 +1,185 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import IO, Callable, Generator, Iterable, List, Tuple
+
+    from rdflib.term import Node
+
+import os
+import tempfile
+import weakref
+from abc import ABC, abstractmethod
+from io import StringIO
+from itertools import islice
+
+from rdflib import URIRef
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, unquote, uriquote
+
+from nt_writer import get_nq_row
+
+
+class ProvenanceSink(ABC):
+    """The destination of the provenance quads that ``generate_provenance`` streams
+    as soon as the snapshots are finished, instead of retaining them in memory.
+
+    Each quad belongs to the provenance named graph of the entity, i.e. ``<entity>/prov/``."""
+
+    @abstractmethod
+    def write(self, quads: Iterable[Tuple[Node, Node, Node, Node]]) -> None:
+        """
+        It receives the quads of one or more finished snapshots.
+
+        :param quads: The quads to be written
+        :type quads: Iterable[Tuple[Node, Node, Node, Node]]
+        :return: None
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        It releases the resources held by the sink.
+
+        :return: None
+        """
+        pass
+
+    def __enter__(self) -> ProvenanceSink:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class NQuadsFileSink(ProvenanceSink):
+    """A ``ProvenanceSink`` that appends the quads to an N-Quads file."""
+
+    def __init__(self, file_path: str) -> None:
+        """
+        Constructor of the ``NQuadsFileSink`` class.
+
+        :param file_path: The path of the N-Quads file, which is created if it does not exist
+        :type file_path: str
+        """
+        self.file_path: str = file_path
+        self._file = open(file_path, 'a', encoding='utf8')
+
+    def write(self, quads: Iterable[Tuple[Node, Node, Node, Node]]) -> None:
+        self._file.writelines(get_nq_row(quad) for quad in quads)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class CallbackSink(ProvenanceSink):
+    """A ``ProvenanceSink`` that passes the quads of every finished snapshot to a callback."""
+
+    def __init__(self, callback: Callable[[List[Tuple[Node, Node, Node, Node]]], None]) -> None:
+        """
+        Constructor of the ``CallbackSink`` class.
+
+        :param callback: The function to be called with the list of the quads of each snapshot
+        :type callback: Callable[[List[Tuple[Node, Node, Node, Node]]], None]
+        """
+        self.callback = callback
+
+    def write(self, quads: Iterable[Tuple[Node, Node, Node, Node]]) -> None:
+        quads = list(quads)
+        if quads:
+            self.callback(quads)
+
+
+class NQuadsSpool(NQuadsFileSink):
+    """A ``ProvenanceSink`` backed by a temporary N-Quads file, where ``OCDMProvenance``
+    spills the snapshots that exceed its memory budget. The quads are read back as a stream
+    and the file is deleted when the spool is closed or garbage collected."""
+
+    def __init__(self, dir: str = None) -> None:
+        """
+        Constructor of the ``NQuadsSpool`` class.
+
+        :param dir: The directory of the temporary file (defaults to the system temporary directory)
+        :type dir: str, optional
+        """
+        fd, file_path = tempfile.mkstemp(suffix='.nq', dir=dir)
+        os.close(fd)
+        super().__init__(file_path)
+        self._finalizer = weakref.finalize(self, _remove_file, self._file, file_path)
+
+    def read(self) -> Generator[Tuple[Node, Node, Node, URIRef], None, None]:
+        """
+        It reads the spilled quads back, one line at a time.
+
+        :return: A generator of quads.
+        """
+        self._file.flush()
+        with open(self.file_path, 'r', encoding='utf8') as f:
+            yield from read_nquads(f)
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+class _TripleCollector(object):
+    # The sink of W3CNTriplesParser, keeping the parsed triples in order
+    def __init__(self) -> None:
+        self.triples: List[Tuple[Node, Node, Node]] = []
+
+    def triple(self, s: Node, p: Node, o: Node) -> None:
+        self.triples.append((s, p, o))
+
+
+def read_nquads(source: IO[str], chunk_size: int = 1000) -> Generator[Tuple[Node, Node, Node, URIRef], None, None]:
+    """
+    It parses N-Quads lazily, a bounded chunk of lines at a time, without loading them into a graph.
+    Each line must hold a single quad in a named graph, as written by ``get_nq_row``.
+
+    :param source: A text stream of N-Quads
+    :type source: IO[str]
+    :param chunk_size: The number of lines parsed at once (defaults to 1000)
+    :type chunk_size: int, optional
+    :return: A generator of quads.
+    """
+    collector = _TripleCollector()
+    parser = W3CNTriplesParser(collector)
+    # Blank nodes with the same label are the same node across chunks
+    bnode_context = dict()
+    while True:
+        lines: List[str] = list(islice(source, chunk_size))
+        if not lines:
+            break
+        triple_rows: List[str] = []
+        graph_iris: List[URIRef] = []
+        for line in lines:
+            # The graph IRI is the last term of the row, after the triple
+            triple_row, graph_term, _ = line.rstrip('\r\n').rsplit(' ', 2)
+            triple_rows.append(triple_row + ' .\n')
+            graph_iris.append(URIRef(uriquote(unquote(graph_term[1:-1]))))
+        collector.triples = []
+        parser.parse(StringIO(''.join(triple_rows)), bnode_context=bnode_context)
+        for (s, p, o), graph_iri in zip(collector.triples, graph_iris):
+            yield s, p, o, graph_iri
+
+
+def _remove_file(file: IO[str], file_path: str) -> None:
+    file.close()
+    if os.path.exists(file_path):
+        os.remove(file_path)
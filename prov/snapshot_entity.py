@@ -18,7 +18,6 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from oc_ocdm.decorators import accepts_only
-from rdflib import XSD
 
 from prov.prov_entity import ProvEntity
 
@@ -60,7 +59,7 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         self.remove_generation_time()
-        self._create_literal(ProvEntity.iri_generated_at_time, string, XSD.dateTime)
+        self.record.add(ProvEntity.iri_generated_at_time, string)
 
     def remove_generation_time(self) -> None:
         """
@@ -68,7 +67,7 @@ class SnapshotEntity(ProvEntity):
 
         :return: None
         """
-        self.g.remove((self.res, ProvEntity.iri_generated_at_time, None))
+        self.record.remove(ProvEntity.iri_generated_at_time)
 
     # HAS INVALIDATION DATE
     def get_invalidation_time(self) -> Optional[str]:
@@ -97,7 +96,7 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         self.remove_invalidation_time()
-        self._create_literal(ProvEntity.iri_invalidated_at_time, string, XSD.dateTime)
+        self.record.add(ProvEntity.iri_invalidated_at_time, string)
 
     def remove_invalidation_time(self) -> None:
         """
@@ -105,7 +104,7 @@ class SnapshotEntity(ProvEntity):
 
         :return: None
         """
-        self.g.remove((self.res, ProvEntity.iri_invalidated_at_time, None))
+        self.record.remove(ProvEntity.iri_invalidated_at_time)
 
     # IS SNAPSHOT OF
     def get_is_snapshot_of(self) -> Optional[URIRef]:
@@ -131,7 +130,7 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         self.remove_is_snapshot_of()
-        self.g.add((self.res, ProvEntity.iri_specialization_of, en_res))
+        self.record.add(ProvEntity.iri_specialization_of, en_res)
 
     def remove_is_snapshot_of(self) -> None:
         """
@@ -139,7 +138,7 @@ class SnapshotEntity(ProvEntity):
 
         :return: None
         """
-        self.g.remove((self.res, ProvEntity.iri_specialization_of, None))
+        self.record.remove(ProvEntity.iri_specialization_of)
 
     # IS DERIVED FROM
     def get_derives_from(self) -> List[ProvEntity]:
@@ -168,7 +167,7 @@ class SnapshotEntity(ProvEntity):
         :raises TypeError: if the parameter is of the wrong type
         :return: None
         """
-        self.g.add((self.res, ProvEntity.iri_was_derived_from, se_res.res))
+        self.record.add(ProvEntity.iri_was_derived_from, se_res.res)
 
     def remove_derives_from(self, se_res: ProvEntity = None) -> None:
         """
@@ -184,9 +183,9 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         if se_res is not None:
-            self.g.remove((self.res, ProvEntity.iri_was_derived_from, se_res.res))
+            self.record.remove(ProvEntity.iri_was_derived_from, se_res.res)
         else:
-            self.g.remove((self.res, ProvEntity.iri_was_derived_from, None))
+            self.record.remove(ProvEntity.iri_was_derived_from)
 
     # HAS PRIMARY SOURCE
     def get_primary_source(self) -> Optional[URIRef]:
@@ -214,7 +213,7 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         self.remove_primary_source()
-        self.g.add((self.res, ProvEntity.iri_had_primary_source, any_res))
+        self.record.add(ProvEntity.iri_had_primary_source, any_res)
 
     def remove_primary_source(self) -> None:
         """
@@ -222,7 +221,7 @@ class SnapshotEntity(ProvEntity):
 
         :return: None
         """
-        self.g.remove((self.res, ProvEntity.iri_had_primary_source, None))
+        self.record.remove(ProvEntity.iri_had_primary_source)
 
     # HAS UPDATE ACTION
     def get_update_action(self) -> Optional[str]:
@@ -249,7 +248,7 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         self.remove_update_action()
-        self._create_literal(ProvEntity.iri_has_update_query, string)
+        self.record.add(ProvEntity.iri_has_update_query, string)
 
     def remove_update_action(self) -> None:
         """
@@ -257,7 +256,7 @@ class SnapshotEntity(ProvEntity):
 
         :return: None
         """
-        self.g.remove((self.res, ProvEntity.iri_has_update_query, None))
+        self.record.remove(ProvEntity.iri_has_update_query)
 
     # HAS DESCRIPTION
     def get_description(self) -> Optional[str]:
@@ -286,7 +285,7 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         self.remove_description()
-        self._create_literal(ProvEntity.iri_description, string)
+        self.record.add(ProvEntity.iri_description, string)
 
     def remove_description(self) -> None:
         """
@@ -294,7 +293,7 @@ class SnapshotEntity(ProvEntity):
 
         :return: None
         """
-        self.g.remove((self.res, ProvEntity.iri_description, None))
+        self.record.remove(ProvEntity.iri_description)
 
     # IS ATTRIBUTED TO
     def get_resp_agent(self) -> Optional[URIRef]:
@@ -320,7 +319,7 @@ class SnapshotEntity(ProvEntity):
         :return: None
         """
         self.remove_resp_agent()
-        self.g.add((self.res, ProvEntity.iri_was_attributed_to, se_agent))
+        self.record.add(ProvEntity.iri_was_attributed_to, se_agent)
 
     def remove_resp_agent(self) -> None:
         """
@@ -328,4 +327,4 @@ class SnapshotEntity(ProvEntity):
 
         :return: None
         """
-        self.g.remove((self.res, ProvEntity.iri_was_attributed_to, None))
\ No newline at end of file
+        self.record.remove(ProvEntity.iri_was_attributed_to)
\ No newline at end of file
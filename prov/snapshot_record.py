@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import ClassVar, Dict, Generator, List, Optional, Tuple
+
+    from rdflib.term import Node
+
+from oc_ocdm.support.support import is_string_empty
+from rdflib import DCTERMS, PROV, RDF, XSD, Graph, Literal, Namespace, URIRef
+
+OCO = Namespace("https://w3id.org/oc/ontology/")
+
+
+class SnapshotRecord(object):
+    """The compact representation of a snapshot of entity metadata.
+
+    Every property of the OCDM provenance model is kept in a slot as a plain value, and the
+    RDF triples are produced only when they are requested. Any other statement about the
+    snapshot is kept in a list of predicate-object pairs."""
+
+    __slots__ = ('res', 'generation_time', 'invalidation_time', 'specialization_of', 'derived_from',
+                 'primary_source', 'resp_agent', 'description', 'update_query', 'other')
+
+    # The functional properties, mapped to their slot and, for literals, to their datatype
+    functional_properties: ClassVar[Dict[URIRef, Tuple[str, Optional[URIRef]]]] = {
+        PROV.generatedAtTime: ('generation_time', XSD.dateTime),
+        PROV.invalidatedAtTime: ('invalidation_time', XSD.dateTime),
+        PROV.specializationOf: ('specialization_of', None),
+        PROV.hadPrimarySource: ('primary_source', None),
+        PROV.wasAttributedTo: ('resp_agent', None),
+        DCTERMS.description: ('description', XSD.string),
+        OCO.hasUpdateQuery: ('update_query', XSD.string)
+    }
+
+    def __init__(self, res: URIRef) -> None:
+        self.res: URIRef = res
+        self.generation_time: Optional[str] = None
+        self.invalidation_time: Optional[str] = None
+        self.specialization_of: Optional[URIRef] = None
+        self.derived_from: Optional[List[URIRef]] = None
+        self.primary_source: Optional[URIRef] = None
+        self.resp_agent: Optional[URIRef] = None
+        self.description: Optional[str] = None
+        self.update_query: Optional[str] = None
+        self.other: Optional[List[Tuple[URIRef, Node]]] = None
+
+    def add(self, p: URIRef, o: Node) -> None:
+        if p in SnapshotRecord.functional_properties:
+            slot, datatype = SnapshotRecord.functional_properties[p]
+            if datatype is not None:
+                # Like a literal created by oc_ocdm, an empty string leaves the property unset
+                o = None if is_string_empty(str(o)) else str(o)
+            setattr(self, slot, o)
+        elif p == PROV.wasDerivedFrom:
+            if self.derived_from is None:
+                self.derived_from = []
+            if o not in self.derived_from:
+                self.derived_from.append(o)
+        else:
+            if self.other is None:
+                self.other = []
+            if (p, o) not in self.other:
+                self.other.append((p, o))
+
+    def remove(self, p: URIRef = None, o: Node = None) -> None:
+        if p is None:
+            for predicate in {predicate for predicate, _ in self.predicate_objects()}:
+                self.remove(predicate, o)
+        elif p in SnapshotRecord.functional_properties:
+            if o is None or any(value == o for value in self.objects(p)):
+                setattr(self, SnapshotRecord.functional_properties[p][0], None)
+        elif p == PROV.wasDerivedFrom:
+            if self.derived_from is not None:
+                self.derived_from = [value for value in self.derived_from if o is not None and value != o] or None
+        elif self.other is not None:
+            self.other = [(predicate, value) for predicate, value in self.other if predicate != p or (o is not None and value != o)] or None
+
+    def objects(self, p: URIRef) -> Generator[Node, None, None]:
+        if p in SnapshotRecord.functional_properties:
+            slot, datatype = SnapshotRecord.functional_properties[p]
+            value = getattr(self, slot)
+            if value is not None:
+                yield value if datatype is None else Literal(value, datatype=datatype, normalize=True)
+        elif p == PROV.wasDerivedFrom:
+            yield from self.derived_from or ()
+        else:
+            yield from (value for predicate, value in self.other or () if predicate == p)
+
+    def predicate_objects(self) -> Generator[Tuple[URIRef, Node], None, None]:
+        yield from ((p, value) for p, value in self.other or () if p == RDF.type)
+        for p in SnapshotRecord.functional_properties:
+            yield from ((p, value) for value in self.objects(p))
+        yield from ((PROV.wasDerivedFrom, value) for value in self.derived_from or ())
+        yield from ((p, value) for p, value in self.other or () if p != RDF.type)
+
+    def triples(self) -> Generator[Tuple[URIRef, URIRef, Node], None, None]:
+        for p, o in self.predicate_objects():
+            yield self.res, p, o
+
+    def to_graph(self) -> Graph:
+        g = Graph()
+        for triple in self.triples():
+            g.add(triple)
+        return g
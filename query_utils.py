@@ -19,37 +19,35 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Tuple
+    from typing import Dict, Generator, Iterable, List, Optional, Tuple
     from rdflib import URIRef
     from rdflib.compare import IsomorphicGraph
 
-from rdflib import ConjunctiveGraph, Graph
+from rdflib import BNode, ConjunctiveGraph, Graph
 from rdflib.compare import graph_diff, to_isomorphic
 
+from nt_writer import get_nt_row
+
+DIFF_SET: str = "set"
+DIFF_ISOMORPHIC: str = "isomorphic"
 
-def get_delete_query(data: ConjunctiveGraph|Graph, graph_iri: URIRef = None) -> Tuple[str, int]:
-    num_of_statements: int = len(data)
-    if num_of_statements <= 0:
-        return "", 0
-    else:
-        statements: str = data.serialize(format="nt11").replace('\n', '')
-        if graph_iri:
-            delete_string: str = f"DELETE DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"
-        else:
-            delete_string: str = f"DELETE DATA {{ {statements} }}"
-        return delete_string, num_of_statements
 
-def get_insert_query(data: ConjunctiveGraph|Graph, graph_iri: URIRef = None) -> Tuple[str, int]:
-    num_of_statements: int = len(data)
+def get_delete_query(data: ConjunctiveGraph|Graph|Iterable[tuple], graph_iri: URIRef = None) -> Tuple[str, int]:
+    return _get_data_block_query("DELETE DATA", data, graph_iri)
+
+def get_insert_query(data: ConjunctiveGraph|Graph|Iterable[tuple], graph_iri: URIRef = None) -> Tuple[str, int]:
+    return _get_data_block_query("INSERT DATA", data, graph_iri)
+
+def _get_data_block_query(operation: str, data: ConjunctiveGraph|Graph|Iterable[tuple], graph_iri: URIRef = None) -> Tuple[str, int]:
+    # Statements are written straight from the terms, with the same rows as the nt11 serializer
+    rows: List[str] = [get_nt_row(statement) for statement in data]
+    num_of_statements: int = len(rows)
     if num_of_statements <= 0:
         return "", 0
-    else:
-        statements: str = data.serialize(format="nt11").replace('\n', '')
-        if graph_iri:
-            insert_string: str = f"INSERT DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"
-        else:
-            insert_string: str = f"INSERT DATA {{ {statements} }}"
-        return insert_string, num_of_statements
+    statements: str = ''.join(rows)
+    if graph_iri:
+        return f"{operation} {{ GRAPH <{graph_iri}> {{ {statements} }} }}", num_of_statements
+    return f"{operation} {{ {statements} }}", num_of_statements
 
 def get_update_query(preexisting_graph: ConjunctiveGraph|Graph, current_graph: ConjunctiveGraph|Graph) -> Tuple[str, int, int]:
     if isinstance(preexisting_graph, ConjunctiveGraph):
@@ -58,14 +56,54 @@ def get_update_query(preexisting_graph: ConjunctiveGraph|Graph, current_graph: C
             break
     elif isinstance(preexisting_graph, Graph):
         graph_iri = None
-    preexisting_iso: IsomorphicGraph = to_isomorphic(preexisting_graph)
-    current_iso: IsomorphicGraph = to_isomorphic(current_graph)
-    if preexisting_iso == current_iso:
-        # Both graphs have exactly the same content!
-        return "", 0, 0
-    _, in_first, in_second = graph_diff(preexisting_iso, current_iso)
+    in_first, in_second, _ = get_graph_diff(preexisting_graph, current_graph)
     delete_string, removed_triples = get_delete_query(in_first, graph_iri)
     insert_string, added_triples = get_insert_query(in_second, graph_iri)
+    return _join_update_queries(delete_string, removed_triples, insert_string, added_triples)
+
+def get_graph_diff(preexisting_graph: ConjunctiveGraph|Graph, current_graph: ConjunctiveGraph|Graph) -> Tuple[Graph, Graph, str]:
+    # Canonicalization is only needed to compare blank nodes, plain set difference is enough otherwise
+    if _has_blank_nodes(preexisting_graph) or _has_blank_nodes(current_graph):
+        preexisting_iso: IsomorphicGraph = to_isomorphic(preexisting_graph)
+        current_iso: IsomorphicGraph = to_isomorphic(current_graph)
+        if preexisting_iso == current_iso:
+            # Both graphs have exactly the same content!
+            return Graph(), Graph(), DIFF_ISOMORPHIC
+        _, in_first, in_second = graph_diff(preexisting_iso, current_iso)
+        return in_first, in_second, DIFF_ISOMORPHIC
+    preexisting_triples = set(preexisting_graph)
+    current_triples = set(current_graph)
+    in_first: Graph = Graph()
+    in_second: Graph = Graph()
+    for triple in preexisting_graph:
+        if triple not in current_triples:
+            in_first.add(triple)
+    for triple in current_graph:
+        if triple not in preexisting_triples:
+            in_second.add(triple)
+    return in_first, in_second, DIFF_SET
+
+def _has_blank_nodes(graph: ConjunctiveGraph|Graph) -> bool:
+    for s, p, o in graph:
+        if isinstance(s, BNode) or isinstance(p, BNode) or isinstance(o, BNode):
+            return True
+    return False
+
+def get_changes_query(removed: Iterable[tuple], added: Iterable[tuple], graph_iri: URIRef = None) -> Tuple[str, int, int]:
+    removed_triples: Dict[tuple, None] = dict.fromkeys(statement[:3] for statement in removed)
+    added_triples: Dict[tuple, None] = dict()
+    for statement in added:
+        triple = statement[:3]
+        if triple in removed_triples:
+            # The statement only moved between contexts of the same named graph
+            del removed_triples[triple]
+        else:
+            added_triples[triple] = None
+    delete_string, removed_triples = get_delete_query(removed_triples, graph_iri)
+    insert_string, added_triples = get_insert_query(added_triples, graph_iri)
+    return _join_update_queries(delete_string, removed_triples, insert_string, added_triples)
+
+def _join_update_queries(delete_string: str, removed_triples: int, insert_string: str, added_triples: int) -> Tuple[str, int, int]:
     if delete_string != "" and insert_string != "":
         return delete_string + '; ' + insert_string, added_triples, removed_triples
     elif delete_string != "":
@@ -73,4 +111,42 @@ def get_update_query(preexisting_graph: ConjunctiveGraph|Graph, current_graph: C
     elif insert_string != "":
         return insert_string, added_triples, 0
     else:
-        return "", 0, 0
\ No newline at end of file
+        return "", 0, 0
+
+def get_batched_update_queries(removed: Iterable[tuple], added: Iterable[tuple], max_statements: int = None, max_bytes: int = None) -> Generator[str, None, None]:
+    # Statements are (s, p, o, graph_iri) quads, where graph_iri is None for the default graph.
+    # Every request is built only when the previous one has been consumed
+    yield from _get_batched_queries("DELETE DATA", removed, max_statements, max_bytes)
+    yield from _get_batched_queries("INSERT DATA", added, max_statements, max_bytes)
+
+def _get_batched_queries(operation: str, statements: Iterable[tuple], max_statements: int = None, max_bytes: int = None) -> Generator[str, None, None]:
+    batch: Dict[Optional[URIRef], List[str]] = dict()
+    num_of_statements: int = 0
+    num_of_bytes: int = len(operation) + 4
+    for statement in statements:
+        row: str = get_nt_row(statement)
+        graph_iri: Optional[URIRef] = statement[3] if len(statement) > 3 else None
+        row_bytes: int = len(row.encode('utf8')) + 1 + _get_graph_block_bytes(graph_iri, batch)
+        if num_of_statements > 0 and ((max_statements is not None and num_of_statements >= max_statements) or (max_bytes is not None and num_of_bytes + row_bytes > max_bytes)):
+            yield _get_data_query(operation, batch)
+            batch = dict()
+            num_of_statements = 0
+            num_of_bytes = len(operation) + 4
+            row_bytes = len(row.encode('utf8')) + 1 + _get_graph_block_bytes(graph_iri, batch)
+        batch.setdefault(graph_iri, []).append(row)
+        num_of_statements += 1
+        num_of_bytes += row_bytes
+    if num_of_statements > 0:
+        yield _get_data_query(operation, batch)
+
+def _get_graph_block_bytes(graph_iri: Optional[URIRef], batch: Dict[Optional[URIRef], List[str]]) -> int:
+    if graph_iri is None or graph_iri in batch:
+        return 0
+    return len(f"GRAPH <{graph_iri}> {{  }} ".encode('utf8'))
+
+def _get_data_query(operation: str, batch: Dict[Optional[URIRef], List[str]]) -> str:
+    blocks: List[str] = []
+    for graph_iri, rows in batch.items():
+        statements: str = ' '.join(rows)
+        blocks.append(statements if graph_iri is None else f"GRAPH <{graph_iri}> {{ {statements} }}")
+    return f"{operation} {{ {' '.join(blocks)} }}"
@@ -22,9 +22,12 @@ if TYPE_CHECKING:
     from rdflib import URIRef
     from typing import Match
 
+import os
 import re
+import tempfile
 
 prov_regex: str = r"^(.+)/prov/([a-z][a-z])/([1-9][0-9]*)$"
+entity_regex: str = r"^(.+)/([a-z][a-z])/(0[1-9]+0)?((?:[1-9][0-9]*)|(?:\d+-\d+))$"
 
 def _get_match(regex: str, group: int, string: str) -> str:
     match: Match = re.match(regex, string)
@@ -39,4 +42,22 @@ def is_string_empty(string: str) -> bool:
 def get_prov_count(res: URIRef) -> str:
     string_iri: str = str(res)
     if "/prov/" in string_iri:
-        return _get_match(prov_regex, 3, string_iri)
\ No newline at end of file
+        return _get_match(prov_regex, 3, string_iri)
+
+
+def write_file_atomically(file_path: str, content: str) -> None:
+    # The content is written to a temporary file in the same folder, which then replaces
+    # the destination, so that a crash never leaves a half-written file behind
+    dir_path: str = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=f'.{os.path.basename(file_path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf8') as outfile:
+            outfile.write(content)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,54 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import unittest
+
+from benchmark.corpus import generate_corpus
+from benchmark.run_benchmarks import compare_results, run_benchmarks
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generate_corpus(self):
+        quads = list(generate_corpus(100, blank_nodes=True))
+        self.assertEqual(quads, list(generate_corpus(100, blank_nodes=True)))
+        subjects = {s for s, _, _, _ in quads}
+        self.assertGreaterEqual(len({s for s in subjects if '/oc/meta/' in s}), 100)
+        self.assertEqual({str(graph_iri).split('/')[-2] for _, _, _, graph_iri in quads}, {'br', 'id', 'ar', 'ra'})
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks([100], counter_handlers=['in-memory'])
+        benchmarks = [result['benchmark'] for result in results]
+        self.assertEqual(benchmarks[:6], ['load', 'preexisting_finished', 'modify', 'merge', 'get_update_query', 'generate_provenance'])
+        self.assertIn('counter_handler[in-memory].increment_counters', benchmarks)
+
+    def test_compare_results(self):
+        baseline = {'results': [
+            {'size': 100, 'benchmark': 'load', 'seconds': 2.0},
+            {'size': 100, 'benchmark': 'merge', 'seconds': 0.5},
+            {'size': 100, 'benchmark': 'modify', 'seconds': 0.0}]}
+        current = {'results': [
+            {'size': 100, 'benchmark': 'load', 'seconds': 1.0},
+            {'size': 100, 'benchmark': 'merge', 'seconds': 0.75},
+            {'size': 100, 'benchmark': 'modify', 'seconds': 0.1},
+            {'size': 100, 'benchmark': 'generate_provenance', 'seconds': 3.0},
+            {'size': 1000, 'benchmark': 'load', 'seconds': 20.0}]}
+        self.assertEqual(compare_results(baseline, current), [
+            {'size': 100, 'benchmark': 'load', 'baseline_seconds': 2.0, 'seconds': 1.0, 'ratio': 0.5},
+            {'size': 100, 'benchmark': 'merge', 'baseline_seconds': 0.5, 'seconds': 0.75, 'ratio': 1.5}])
+
+
+if __name__ == '__main__':
+    unittest.main()
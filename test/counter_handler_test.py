@@ -0,0 +1,259 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from multiprocessing import Pool
+
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
+
+from counter_handler.async_counter_handler import AsyncCounterHandler, ExecutorCounterHandler
+from counter_handler.dbm_counter_handler import DbmCounterHandler, LmdbCounterHandler
+from counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from counter_handler.leasing_counter_handler import CounterLeaseError, LeasingCounterHandler
+from counter_handler.sharded_filesystem_counter_handler import ShardedFilesystemCounterHandler
+from counter_handler.sqlite_counter_handler import SqliteCounterHandler
+
+
+def increment_shared_counter(database: str) -> list:
+    counter_handler = LeasingCounterHandler(database)
+    values = [counter_handler.increment_counter('https://w3id.org/oc/meta/br/0605') for _ in range(25)]
+    counter_handler.close()
+    return values
+
+
+class DictAsyncCounterHandler(AsyncCounterHandler):
+    def __init__(self):
+        self.counters = dict()
+
+    async def set_counter(self, new_value, entity_name):
+        await asyncio.sleep(0)
+        self.counters[entity_name] = new_value
+
+    async def read_counter(self, entity_name):
+        await asyncio.sleep(0)
+        return self.counters.get(entity_name, 0)
+
+    async def increment_counter(self, entity_name):
+        await asyncio.sleep(0)
+        self.counters[entity_name] = self.counters.get(entity_name, 0) + 1
+        return self.counters[entity_name]
+
+
+class TestCounterHandlers(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.entities = ['https://w3id.org/oc/meta/br/0605', 'https://w3id.org/oc/meta/br/0601']
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_counter_handlers(self):
+        return {
+            'in-memory': InMemoryCounterHandler(),
+            'filesystem': FilesystemCounterHandler(os.path.join(self.tmp_dir, 'info_dir')),
+            'database': SqliteCounterHandler(os.path.join(self.tmp_dir, 'database.db')),
+            'sharded filesystem': ShardedFilesystemCounterHandler(os.path.join(self.tmp_dir, 'shards')),
+            'leasing database': LeasingCounterHandler(os.path.join(self.tmp_dir, 'leasing.db'), lease_size=10),
+            'dbm': DbmCounterHandler(os.path.join(self.tmp_dir, 'dbm', 'counters'), base_iri='https://w3id.org/oc/meta')
+        }
+
+    def test_bulk_counters(self):
+        for name, counter_handler in self.get_counter_handlers().items():
+            with self.subTest(name):
+                self.assertEqual(counter_handler.read_counters(self.entities), {self.entities[0]: 0, self.entities[1]: 0})
+                self.assertEqual(counter_handler.increment_counters(self.entities), {self.entities[0]: 1, self.entities[1]: 1})
+                counter_handler.set_counters({self.entities[0]: 5})
+                self.assertEqual(counter_handler.read_counters(self.entities), {self.entities[0]: 5, self.entities[1]: 1})
+                self.assertEqual(counter_handler.read_counter(self.entities[0]), 5)
+                self.assertEqual(counter_handler.increment_counter(self.entities[1]), 2)
+                with self.assertRaises(ValueError):
+                    counter_handler.set_counters({self.entities[0]: -1})
+
+    def test_async_counters(self):
+        async def use_counters(counter_handler):
+            self.assertEqual(await counter_handler.read_counters(self.entities), {self.entities[0]: 0, self.entities[1]: 0})
+            async with counter_handler.batch():
+                self.assertEqual(await counter_handler.increment_counters(self.entities), {self.entities[0]: 1, self.entities[1]: 1})
+            await counter_handler.set_counters({self.entities[0]: 5})
+            self.assertEqual(await counter_handler.read_counter(self.entities[0]), 5)
+            self.assertEqual(await counter_handler.increment_counter(self.entities[1]), 2)
+            await counter_handler.flush()
+        for name, counter_handler in self.get_counter_handlers().items():
+            with self.subTest(name):
+                async_counter_handler = ExecutorCounterHandler(counter_handler)
+                asyncio.run(use_counters(async_counter_handler))
+                async_counter_handler.close()
+                self.assertEqual(counter_handler.read_counters(self.entities), {self.entities[0]: 5, self.entities[1]: 2})
+        asyncio.run(use_counters(DictAsyncCounterHandler()))
+
+    def test_filesystem_write_back(self):
+        info_dir = os.path.join(self.tmp_dir, 'info_dir')
+        index_path = os.path.join(info_dir, 'provenance_index.json')
+        with FilesystemCounterHandler(info_dir, write_back=True) as counter_handler:
+            counter_handler.increment_counter(self.entities[0])
+            counter_handler.set_counter(3, self.entities[1])
+            self.assertFalse(os.path.exists(index_path))
+            self.assertEqual(counter_handler.read_counter(self.entities[1]), 3)
+        with open(index_path, 'r', encoding='utf8') as index_file:
+            self.assertEqual(json.load(index_file), {self.entities[0]: 1, self.entities[1]: 3})
+        counter_handler = FilesystemCounterHandler(info_dir, write_back=True, flush_threshold=2)
+        counter_handler.increment_counter(self.entities[0])
+        with open(index_path, 'r', encoding='utf8') as index_file:
+            self.assertEqual(json.load(index_file)[self.entities[0]], 1)
+        counter_handler.increment_counter(self.entities[1])
+        with open(index_path, 'r', encoding='utf8') as index_file:
+            self.assertEqual(json.load(index_file), {self.entities[0]: 2, self.entities[1]: 4})
+        self.assertEqual(os.listdir(info_dir), ['provenance_index.json'])
+
+    def test_sqlite_without_upsert(self):
+        counter_handler = SqliteCounterHandler(os.path.join(self.tmp_dir, 'database.db'))
+        # The statements of SQLite versions older than 3.24.0
+        counter_handler.supports_upsert = False
+        counter_handler.supports_returning = False
+        self.assertEqual(counter_handler.increment_counter(self.entities[0]), 1)
+        self.assertEqual(counter_handler.increment_counters([self.entities[0], self.entities[1], self.entities[0]]), {self.entities[0]: 3, self.entities[1]: 1})
+        counter_handler.close()
+
+    def test_sqlite_batch(self):
+        database = os.path.join(self.tmp_dir, 'database.db')
+        counter_handler = SqliteCounterHandler(database)
+        quoted_entity = "https://w3id.org/oc/meta/br/06'01"
+        self.assertEqual(counter_handler.increment_counter(quoted_entity), 1)
+        self.assertEqual(counter_handler.increment_counter(quoted_entity), 2)
+        with counter_handler.batch():
+            counter_handler.set_counters({self.entities[0]: 4})
+            counter_handler.increment_counter(self.entities[0])
+            self.assertEqual(SqliteCounterHandler(database).read_counter(self.entities[0]), 0)
+        self.assertEqual(SqliteCounterHandler(database).read_counter(self.entities[0]), 5)
+        with self.assertRaises(RuntimeError):
+            with counter_handler.batch():
+                counter_handler.increment_counter(self.entities[0])
+                raise RuntimeError
+        self.assertEqual(counter_handler.read_counter(self.entities[0]), 5)
+        self.assertEqual(counter_handler.read_counter(quoted_entity), 2)
+
+    def test_sharded_filesystem(self):
+        info_dir = os.path.join(self.tmp_dir, 'shards')
+        counter_handler = ShardedFilesystemCounterHandler(info_dir, shard_size=100, max_loaded_shards=1)
+        with counter_handler.batch():
+            counter_handler.increment_counters(['https://w3id.org/oc/meta/br/0605', 'https://w3id.org/oc/meta/br/060150', 'https://w3id.org/oc/meta/id/0605'])
+            counter_handler.set_counter(2, 'https://example.org/entity')
+        with open(os.path.join(info_dir, 'br', '060', '0.json'), 'r', encoding='utf8') as shard_file:
+            self.assertEqual(json.load(shard_file), {'https://w3id.org/oc/meta/br/0605': 1})
+        with open(os.path.join(info_dir, 'br', '060', '1.json'), 'r', encoding='utf8') as shard_file:
+            self.assertEqual(json.load(shard_file), {'https://w3id.org/oc/meta/br/060150': 1})
+        self.assertTrue(os.path.isfile(os.path.join(info_dir, 'id', '060', '0.json')))
+        self.assertEqual(ShardedFilesystemCounterHandler(info_dir).read_counter('https://example.org/entity'), 2)
+
+    def test_leasing_multiprocess(self):
+        database = os.path.join(self.tmp_dir, 'database.db')
+        LeasingCounterHandler(database).close()
+        with Pool(4) as pool:
+            results = pool.map(increment_shared_counter, [database] * 4)
+        values = [value for result in results for value in result]
+        self.assertEqual(sorted(values), list(range(1, 101)))
+        self.assertEqual(LeasingCounterHandler(database).read_counter('https://w3id.org/oc/meta/br/0605'), 100)
+
+    def test_leasing(self):
+        database = os.path.join(self.tmp_dir, 'database.db')
+        entity = self.entities[0]
+        with LeasingCounterHandler(database, lease_size=10, owner='a') as owner_a:
+            self.assertEqual(owner_a.increment_counters([entity, entity, self.entities[1]]), {entity: 2, self.entities[1]: 1})
+            self.assertEqual(owner_a.increment_counter(entity), 3)
+            owner_b = LeasingCounterHandler(database, lease_size=10, owner='b')
+            self.assertEqual(SqliteCounterHandler(database).read_counter(entity), 10)
+            owner_a.flush()
+            self.assertEqual(owner_b.read_counter(entity), 3)
+            with self.assertRaises(CounterLeaseError):
+                owner_b.set_counter(1, entity)
+            # The entity is leased by a, hence b mints beyond the reserved block
+            self.assertEqual(owner_b.increment_counters([entity, entity]), {entity: 12})
+            self.assertEqual(owner_b.read_counter(entity), 12)
+            self.assertEqual(owner_a.increment_counter(entity), 4)
+        # The unused values of a could not be given back
+        self.assertEqual(SqliteCounterHandler(database).read_counter(entity), 12)
+        self.assertEqual(owner_b.increment_counter(entity), 13)
+        self.assertEqual(owner_b.increment_counter(self.entities[1]), 2)
+        # An exhausted lease is released at once
+        owner_b.increment_counters(['https://w3id.org/oc/meta/id/0605'] * 10)
+        self.assertNotIn('https://w3id.org/oc/meta/id/0605', owner_b._leases)
+        self.assertEqual(SqliteCounterHandler(database).cur.execute("SELECT COUNT(*) FROM leases WHERE entity = ?", ('https://w3id.org/oc/meta/id/0605',)).fetchone()[0], 0)
+        # The owner b crashes: only the values it wrote survive
+        owner_b.flush()
+        owner_b.increment_counter(entity)
+        owner_c = LeasingCounterHandler(database, lease_size=10, owner='c')
+        self.assertEqual(owner_c.reconcile(), 2)
+        self.assertEqual(SqliteCounterHandler(database).read_counters([entity, self.entities[1]]), {entity: 13, self.entities[1]: 2})
+        self.assertEqual(owner_c.increment_counter(entity), 14)
+
+    def test_leasing_extension(self):
+        database = os.path.join(self.tmp_dir, 'database.db')
+        entity = self.entities[0]
+        owner_a = LeasingCounterHandler(database, lease_size=3, owner='a')
+        owner_b = LeasingCounterHandler(database, lease_size=3, owner='b')
+        self.assertEqual(owner_a.increment_counter(entity), 1)
+        owner_a.flush()
+        self.assertEqual([owner_b.increment_counter(entity) for _ in range(2)], [4, 5])
+        # The lease of a is extended after the values minted by b
+        self.assertEqual(owner_a.increment_counters([entity, entity, entity]), {entity: 8})
+        self.assertEqual(owner_a.increment_counters([entity, entity, entity]), {entity: 11})
+        owner_a.close()
+        self.assertEqual(owner_b.increment_counter(entity), 12)
+        owner_b.close()
+
+    def test_dbm_keys(self):
+        database = os.path.join(self.tmp_dir, 'counters')
+        with DbmCounterHandler(database, base_iri='https://w3id.org/oc/meta/') as counter_handler:
+            with counter_handler.batch():
+                counter_handler.increment_counters([self.entities[0], self.entities[0], 'https://example.org/br/0605'])
+            self.assertEqual(counter_handler._db.get(b'br/0605'), b'2')
+            self.assertEqual(counter_handler._db.get(b'<https://example.org/br/0605'), b'1')
+        counter_handler.close()
+        counter_handler = DbmCounterHandler(database, base_iri='https://w3id.org/oc/meta/')
+        self.assertEqual(counter_handler.read_counters([self.entities[0], 'https://example.org/br/0605']), {self.entities[0]: 2, 'https://example.org/br/0605': 1})
+        counter_handler.close()
+
+    @unittest.skipIf(lmdb is None, "the optional lmdb package is not installed")
+    def test_lmdb(self):
+        database = os.path.join(self.tmp_dir, 'lmdb')
+        with LmdbCounterHandler(database, base_iri='https://w3id.org/oc/meta/') as counter_handler:
+            self.assertEqual(counter_handler.read_counters(self.entities), {self.entities[0]: 0, self.entities[1]: 0})
+            with counter_handler.batch():
+                self.assertEqual(counter_handler.increment_counters([self.entities[0], self.entities[0], self.entities[1]]), {self.entities[0]: 2, self.entities[1]: 1})
+                self.assertEqual(counter_handler.read_counter(self.entities[0]), 2)
+            with self.assertRaises(RuntimeError):
+                with counter_handler.batch():
+                    counter_handler.set_counter(10, self.entities[0])
+                    raise RuntimeError
+            self.assertEqual(counter_handler.read_counter(self.entities[0]), 2)
+            self.assertEqual(counter_handler.increment_counter(self.entities[1]), 2)
+        counter_handler.close()
+        counter_handler = LmdbCounterHandler(database, base_iri='https://w3id.org/oc/meta/')
+        self.assertEqual(counter_handler.read_counters(self.entities), {self.entities[0]: 2, self.entities[1]: 2})
+        counter_handler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
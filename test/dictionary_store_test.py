@@ -0,0 +1,77 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import os
+import unittest
+
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef
+
+from dictionary_store import DictionaryStore
+from ocdm_graph import OCDMConjunctiveGraph, OCDMGraph
+
+
+class TestDictionaryStore(unittest.TestCase):
+    def setUp(self):
+        self.subject = URIRef('https://w3id.org/oc/meta/br/0605')
+        self.title = URIRef('http://purl.org/dc/terms/title')
+        self.graph_iri = URIRef('https://w3id.org/oc/meta/br/')
+
+    def test_conjunctive_graph(self):
+        memory_graph = ConjunctiveGraph()
+        dictionary_graph = ConjunctiveGraph(store='Dictionary')
+        self.assertIsInstance(dictionary_graph.store, DictionaryStore)
+        for graph in (memory_graph, dictionary_graph):
+            graph.parse(os.path.join('test', 'br.nq'))
+            graph.add((self.subject, self.title, Literal('Bella zì'), graph.get_context(URIRef('https://w3id.org/oc/meta/other/'))))
+        self.assertEqual(len(dictionary_graph), len(memory_graph))
+        self.assertEqual(set(dictionary_graph.quads()), set(memory_graph.quads()))
+        self.assertEqual({c.identifier for c in dictionary_graph.contexts()}, {c.identifier for c in memory_graph.contexts()})
+        self.assertEqual(set(dictionary_graph.quads((None, None, URIRef('https://w3id.org/oc/meta/id/0605')))), set(memory_graph.quads((None, None, URIRef('https://w3id.org/oc/meta/id/0605')))))
+        self.assertEqual(len(dictionary_graph.get_context(self.graph_iri)), len(memory_graph.get_context(self.graph_iri)))
+        for graph in (memory_graph, dictionary_graph):
+            graph.remove((self.subject, self.title, None, graph.get_context(self.graph_iri)))
+            graph.remove((None, None, URIRef('https://w3id.org/oc/meta/id/0605')))
+        self.assertEqual(len(dictionary_graph), len(memory_graph))
+        self.assertEqual(set(dictionary_graph.quads()), set(memory_graph.quads()))
+        self.assertEqual(list(dictionary_graph.objects(self.subject, self.title)), [Literal('Bella zì')])
+
+    def test_ocdm_graph(self):
+        prov_quads = []
+        for store in ('default', 'Dictionary'):
+            ocdm_graph = OCDMGraph(store=store)
+            ocdm_graph.parse(os.path.join('test', 'br.nt'))
+            ocdm_graph.preexisting_finished(c_time=0)
+            ocdm_graph.remove((self.subject, self.title, None))
+            ocdm_graph.add((self.subject, self.title, Literal('Bella zì')))
+            ocdm_graph.generate_provenance(c_time=0)
+            prov_quads.append(set(ocdm_graph.provenance.get_quads()))
+        self.assertEqual(prov_quads[0], prov_quads[1])
+
+    def test_ocdm_conjunctive_graph_merge(self):
+        prov_quads = []
+        for store in ('default', 'Dictionary'):
+            ocdm_conjunctive_graph = OCDMConjunctiveGraph(store=store)
+            ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+            ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+            ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+            ocdm_conjunctive_graph.generate_provenance(c_time=0)
+            prov_quads.append(set(ocdm_conjunctive_graph.provenance.get_quads()))
+            self.assertEqual(len(list(ocdm_conjunctive_graph.quads((None, None, URIRef('https://w3id.org/oc/meta/id/0636064270'))))), 0)
+        self.assertEqual(prov_quads[0], prov_quads[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
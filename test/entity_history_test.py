@@ -0,0 +1,67 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import os
+import unittest
+
+from rdflib import Literal, URIRef
+
+from ocdm_graph import OCDMConjunctiveGraph
+from prov.entity_history import EntityHistory
+
+
+class TestEntityHistory(unittest.TestCase):
+    def setUp(self):
+        self.subject = URIRef('https://w3id.org/oc/meta/br/0605')
+        self.title = URIRef('http://purl.org/dc/terms/title')
+        self.ocdm_conjunctive_graph = OCDMConjunctiveGraph()
+        self.ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+        self.ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+        self.ocdm_conjunctive_graph.generate_provenance(c_time=0)
+        self.ocdm_conjunctive_graph.commit_changes()
+        self.states = [set(self.ocdm_conjunctive_graph.triples((self.subject, None, None)))]
+        context = self.ocdm_conjunctive_graph.get_context(URIRef('https://w3id.org/oc/meta/br/'))
+        for i in range(1, 8):
+            self.ocdm_conjunctive_graph.remove((self.subject, self.title, None))
+            self.ocdm_conjunctive_graph.add((self.subject, self.title, Literal(f'Title {i}'), context))
+            self.ocdm_conjunctive_graph.generate_provenance(c_time=i * 100)
+            self.ocdm_conjunctive_graph.commit_changes()
+            self.states.append(set(self.ocdm_conjunctive_graph.triples((self.subject, None, None))))
+        self.provenance_graph = self.ocdm_conjunctive_graph.provenance.to_dataset()
+
+    def test_get_state(self):
+        for checkpoint_interval in (None, 1, 3):
+            with self.subTest(checkpoint_interval=checkpoint_interval):
+                entity_history = EntityHistory(self.ocdm_conjunctive_graph, self.provenance_graph, checkpoint_interval, cache_size=4)
+                self.assertEqual([snapshot.number for snapshot in entity_history.get_snapshots(self.subject)], list(range(1, 9)))
+                for number, state in enumerate(self.states, start=1):
+                    self.assertEqual(set(entity_history.get_state(self.subject, number)), state)
+                self.assertLessEqual(len(entity_history._states), 4)
+                self.assertRaises(ValueError, entity_history.get_state, self.subject, 9)
+
+    def test_get_state_at(self):
+        entity_history = EntityHistory(self.ocdm_conjunctive_graph, self.provenance_graph, checkpoint_interval=3)
+        self.assertEqual(sorted(entity_history._get_history(self.subject)[1]), [0, 3, 6, 7])
+        self.assertIsNone(entity_history.get_state_at(self.subject, -1))
+        self.assertEqual(set(entity_history.get_state_at(self.subject, 0)), self.states[0])
+        self.assertEqual(set(entity_history.get_state_at(self.subject, 250)), self.states[2])
+        self.assertEqual(set(entity_history.get_state_at(self.subject, '1970-01-01T00:05:00+00:00')), self.states[3])
+        self.assertEqual(set(entity_history.get_state_at(self.subject, 10000)), self.states[7])
+        self.assertIn((self.subject, self.title, Literal('Title 2')), entity_history.get_state_at(self.subject, 299))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,16 +14,23 @@
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
 
+import asyncio
 import json
 import os
+import shutil
+import sys
+import tempfile
 import unittest
 
-from rdflib import Literal, URIRef
+from rdflib import ConjunctiveGraph, Literal, URIRef
 
 from counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from counter_handler.leasing_counter_handler import LeasingCounterHandler
 from counter_handler.sqlite_counter_handler import SqliteCounterHandler
+from metrics import InstrumentedCounterHandler, Metrics
 from ocdm_graph import OCDMConjunctiveGraph, OCDMGraph
-from prov.provenance import OCDMProvenance
+from prov.provenance import SNAPSHOT_BYTES, OCDMProvenance
+from prov.provenance_sink import CallbackSink, NQuadsFileSink
 from prov.snapshot_entity import SnapshotEntity
 
 
@@ -86,7 +93,8 @@ class TestOCDMProvenance(unittest.TestCase):
             self.assertEqual(se_a_2.get_derives_from()[0].res, URIRef('https://w3id.org/oc/meta/br/0605/prov/se/1'))
             self.assertEqual(se_a_2.get_update_action(), 'DELETE DATA { GRAPH <https://w3id.org/oc/meta/br/> { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "A Review Of Hemolytic Uremic Syndrome In Patients Treated With Gemcitabine Therapy" . } }; INSERT DATA { GRAPH <https://w3id.org/oc/meta/br/> { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "Bella zì" . } }')
             with open(os.path.join('test', 'info_dir', 'provenance_index.json'), 'r', encoding='utf8') as outfile:
-                self.assertEqual(json.load(outfile), {'https://w3id.org/oc/meta/br/0605': 2, 'https://w3id.org/oc/meta/br/0636066666': 1, 'https://w3id.org/oc/meta/id/0636064270': 1, 'https://w3id.org/oc/meta/id/0605': 1})
+                # Only the modified entity is visited by generate_provenance
+                self.assertEqual(json.load(outfile), {'https://w3id.org/oc/meta/br/0605': 2})
         with self.subTest('Modification. OCDMConjunctiveGraph. database counter'):
             counter_handler = SqliteCounterHandler(os.path.join('test', 'database.db'))
             ocdm_conjunctive_graph = OCDMConjunctiveGraph(counter_handler=counter_handler)
@@ -102,11 +110,60 @@ class TestOCDMProvenance(unittest.TestCase):
             self.assertEqual(se_a_2.get_derives_from()[0].res, URIRef('https://w3id.org/oc/meta/br/0605/prov/se/1'))
             self.assertEqual(se_a_2.get_update_action(), 'DELETE DATA { GRAPH <https://w3id.org/oc/meta/br/> { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "A Review Of Hemolytic Uremic Syndrome In Patients Treated With Gemcitabine Therapy" . } }; INSERT DATA { GRAPH <https://w3id.org/oc/meta/br/> { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "Bella zì" . } }')
     
+    def test_generate_provenance_restored_triple(self):
+        ocdm_graph = OCDMGraph()
+        ocdm_graph.parse(os.path.join('test', 'br.nt'))
+        ocdm_graph.preexisting_finished()
+        title = (URIRef(self.subject), URIRef('http://purl.org/dc/terms/title'), Literal('A Review Of Hemolytic Uremic Syndrome In Patients Treated With Gemcitabine Therapy'))
+        ocdm_graph.remove(title)
+        ocdm_graph.add(title)
+        ocdm_graph.generate_provenance()
+        self.assertIsNone(ocdm_graph.get_entity(f'{self.subject}/prov/se/2'))
+        ocdm_graph.remove((URIRef(self.subject), URIRef('http://purl.org/dc/terms/title'), None))
+        ocdm_graph.generate_provenance()
+        se_a_2: SnapshotEntity = ocdm_graph.get_entity(f'{self.subject}/prov/se/2')
+        self.assertEqual(se_a_2.get_update_action(), 'DELETE DATA { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "A Review Of Hemolytic Uremic Syndrome In Patients Treated With Gemcitabine Therapy" . }')
+
+    def test_generate_provenance_new_entity(self):
+        ocdm_graph = OCDMGraph()
+        ocdm_graph.parse(os.path.join('test', 'br.nt'))
+        ocdm_graph.preexisting_finished(resp_agent='https://orcid.org/0000-0002-8420-0696')
+        new_subject = URIRef('https://w3id.org/oc/meta/br/0607')
+        ocdm_graph.add((new_subject, URIRef('http://purl.org/dc/terms/title'), Literal('Bella zì')))
+        ocdm_graph.generate_provenance()
+        se_new: SnapshotEntity = ocdm_graph.get_entity(f'{new_subject}/prov/se/1')
+        self.assertIsNotNone(se_new)
+        self.assertEqual(se_new.get_description(), f"The entity '{new_subject}' has been created.")
+        self.assertEqual(se_new.get_resp_agent(), URIRef('https://orcid.org/0000-0002-8420-0696'))
+        self.assertIsNone(ocdm_graph.get_entity(f'{self.subject}/prov/se/2'))
+
+    def test_generate_provenance_lazy(self):
+        prov_graphs = []
+        for lazy in (False, True):
+            ocdm_conjunctive_graph = OCDMConjunctiveGraph()
+            ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+            ocdm_conjunctive_graph.preexisting_finished(c_time=0, lazy=lazy)
+            if lazy:
+                self.assertEqual(ocdm_conjunctive_graph.entity_index, dict())
+                self.assertEqual(ocdm_conjunctive_graph.provenance.res_to_entity, dict())
+            ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+            ocdm_conjunctive_graph.generate_provenance(c_time=0)
+            prov_graphs.append({res: set(entity.triples()) for res, entity in ocdm_conjunctive_graph.provenance.res_to_entity.items()})
+        self.assertEqual(set(prov_graphs[1]), {
+            'https://w3id.org/oc/meta/id/0605/prov/se/1', 'https://w3id.org/oc/meta/id/0605/prov/se/2',
+            'https://w3id.org/oc/meta/id/0636064270/prov/se/1', 'https://w3id.org/oc/meta/id/0636064270/prov/se/2',
+            'https://w3id.org/oc/meta/br/0636066666/prov/se/1', 'https://w3id.org/oc/meta/br/0636066666/prov/se/2'})
+        self.assertEqual({res: prov_graphs[0][res] for res in prov_graphs[1]}, prov_graphs[1])
+
     def test_generate_provenance_after_merge(self):
         ocdm_conjunctive_graph = OCDMConjunctiveGraph()
         ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
         ocdm_conjunctive_graph.preexisting_finished()
         ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+        self.assertEqual(ocdm_conjunctive_graph.merge_index, {URIRef('https://w3id.org/oc/meta/id/0605'): [URIRef('https://w3id.org/oc/meta/id/0636064270')]})
+        self.assertEqual(ocdm_conjunctive_graph.get_survivor(URIRef('https://w3id.org/oc/meta/id/0636064270')), URIRef('https://w3id.org/oc/meta/id/0605'))
+        # Rewritten references stay in the named graph they came from
+        self.assertEqual([c.identifier for c in ocdm_conjunctive_graph.contexts((URIRef('https://w3id.org/oc/meta/br/0636066666'), URIRef('http://purl.org/spar/datacite/hasIdentifier'), URIRef('https://w3id.org/oc/meta/id/0605')))], [URIRef('https://w3id.org/oc/meta/br/')])
         ocdm_conjunctive_graph.generate_provenance()
         se_a_2: SnapshotEntity = ocdm_conjunctive_graph.get_entity(f'https://w3id.org/oc/meta/id/0605/prov/se/2')
         self.assertIsNotNone(se_a_2)
@@ -128,5 +185,204 @@ class TestOCDMProvenance(unittest.TestCase):
         self.assertEqual(se_id_0636064270_2.get_description(), "The entity 'https://w3id.org/oc/meta/id/0636064270' was modified.")
         self.assertEqual(se_id_0636064270_2.get_update_action(), "DELETE DATA { GRAPH <https://w3id.org/oc/meta/id/> { <https://w3id.org/oc/meta/id/0636064270> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://purl.org/spar/datacite/Identifier> . } }")
 
+    def test_snapshot_record(self):
+        ocdm_prov_memory = OCDMProvenance(OCDMGraph())
+        se = SnapshotEntity(self.subject, ocdm_prov_memory, '2')
+        se.is_snapshot_of(URIRef(self.subject))
+        se.has_generation_time('2023-01-01T00:00:00+00:00')
+        se.has_description('')
+        se.has_description("The entity was modified.")
+        se.derives_from(SnapshotEntity(self.subject, ocdm_prov_memory, '1'))
+        self.assertEqual(se.get_is_snapshot_of(), URIRef(self.subject))
+        self.assertEqual(se.get_generation_time(), '2023-01-01T00:00:00+00:00')
+        self.assertEqual(se.get_description(), "The entity was modified.")
+        self.assertEqual([snapshot.res for snapshot in se.get_derives_from()], [URIRef(f'{self.subject}/prov/se/1')])
+        self.assertEqual(len(se.g), 5)
+        self.assertEqual(set(se.triples()), set(se.g))
+        with self.assertRaises(TypeError):
+            se.has_resp_agent('https://orcid.org/0000-0002-8420-0696')
+        se.remove_description()
+        se.remove_derives_from()
+        self.assertIsNone(se.get_description())
+        self.assertEqual(se.get_derives_from(), [])
+        self.assertEqual(len(se.g), 3)
+
+    def test_provenance_export(self):
+        ocdm_conjunctive_graph = OCDMConjunctiveGraph()
+        ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+        ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+        ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+        ocdm_conjunctive_graph.generate_provenance(c_time=0)
+        provenance = ocdm_conjunctive_graph.provenance
+        dataset = provenance.to_dataset()
+        self.assertEqual(len(dataset), sum(len(entity.g) for entity in provenance.res_to_entity.values()))
+        prov_graph = dataset.get_context(URIRef('https://w3id.org/oc/meta/id/0605/prov/'))
+        self.assertEqual(set(prov_graph.subjects(unique=True)), {URIRef('https://w3id.org/oc/meta/id/0605/prov/se/1'), URIRef('https://w3id.org/oc/meta/id/0605/prov/se/2')})
+        parsed_dataset = ConjunctiveGraph()
+        parsed_dataset.parse(data=provenance.serialize(), format='nquads')
+        self.assertEqual({(s, p, o, c.identifier) for s, p, o, c in parsed_dataset.quads()}, {(s, p, o, c.identifier) for s, p, o, c in dataset.quads()})
+        parsed_dataset = ConjunctiveGraph()
+        parsed_dataset.parse(data=provenance.serialize(format='json-ld'), format='json-ld')
+        self.assertEqual(len(parsed_dataset), len(dataset))
+
+    def test_get_update_queries(self):
+        ocdm_conjunctive_graph = OCDMConjunctiveGraph()
+        ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+        ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+        ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+        ocdm_conjunctive_graph.generate_provenance(c_time=0)
+        provenance = ocdm_conjunctive_graph.provenance
+        queries = list(provenance.get_update_queries(max_statements=10))
+        self.assertEqual(queries[0], "DELETE DATA { GRAPH <https://w3id.org/oc/meta/br/> { <https://w3id.org/oc/meta/br/0636066666> <http://purl.org/spar/datacite/hasIdentifier> <https://w3id.org/oc/meta/id/0636064270> . } GRAPH <https://w3id.org/oc/meta/id/> { <https://w3id.org/oc/meta/id/0636064270> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://purl.org/spar/datacite/Identifier> . } }")
+        self.assertTrue(queries[1].startswith("INSERT DATA { GRAPH <https://w3id.org/oc/meta/br/> { <https://w3id.org/oc/meta/br/0636066666> <http://purl.org/spar/datacite/hasIdentifier> <https://w3id.org/oc/meta/id/0605> . } GRAPH <https://w3id.org/oc/meta/"))
+        num_of_prov_quads = len(list(provenance.get_quads()))
+        self.assertEqual(len(queries), 1 + -(-(num_of_prov_quads + 1) // 10))
+
+    def test_generate_provenance_leasing(self):
+        tmp_dir = tempfile.mkdtemp()
+        database = os.path.join(tmp_dir, 'database.db')
+        owner_a = LeasingCounterHandler(database, lease_size=10, owner='a')
+        ocdm_graph_a = OCDMConjunctiveGraph(owner_a)
+        ocdm_graph_a.parse(os.path.join('test', 'br.nq'))
+        ocdm_graph_a.preexisting_finished(c_time=0)
+        owner_b = LeasingCounterHandler(database, lease_size=10, owner='b')
+        ocdm_graph_b = OCDMConjunctiveGraph(owner_b)
+        ocdm_graph_b.parse(os.path.join('test', 'br.nq'))
+        ocdm_graph_b.preexisting_finished(c_time=0)
+        self.assertEqual(ocdm_graph_b.provenance.res_to_entity, dict())
+        ocdm_graph_b.remove((URIRef(self.subject), URIRef('http://purl.org/dc/terms/title'), None))
+        ocdm_graph_b.generate_provenance(c_time=0)
+        # The snapshot of b is minted beyond the block leased by a, but derives from the last snapshot
+        provenance = ocdm_graph_b.provenance
+        self.assertEqual(set(provenance.res_to_entity), {self.subject + '/prov/se/1', self.subject + '/prov/se/11'})
+        last_snapshot = provenance.get_entity(self.subject + '/prov/se/1')
+        self.assertEqual(last_snapshot.get_invalidation_time(), '1970-01-01T00:00:00+00:00')
+        self.assertEqual([snapshot.res for snapshot in provenance.get_entity(self.subject + '/prov/se/11').get_derives_from()], [last_snapshot.res])
+        owner_a.close()
+        owner_b.close()
+        shutil.rmtree(tmp_dir)
+
+    def test_generate_provenance_async(self):
+        prov_graphs = []
+        tmp_dir = tempfile.mkdtemp()
+        for use_async in (False, True):
+            database = os.path.join(tmp_dir, f'{use_async}.db')
+            ocdm_conjunctive_graph = OCDMConjunctiveGraph(SqliteCounterHandler(database))
+            ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+            ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+            ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+            if use_async:
+                asyncio.run(ocdm_conjunctive_graph.generate_provenance_async(c_time=0))
+            else:
+                ocdm_conjunctive_graph.generate_provenance(c_time=0)
+            ocdm_conjunctive_graph.provenance.counter_handler.close()
+            prov_graphs.append({res: set(entity.triples()) for res, entity in ocdm_conjunctive_graph.provenance.res_to_entity.items()})
+        shutil.rmtree(tmp_dir)
+        self.assertEqual(prov_graphs[0], prov_graphs[1])
+
+    def test_generate_provenance_parallel(self):
+        serializations = []
+        for processes in (None, 2):
+            ocdm_conjunctive_graph = OCDMConjunctiveGraph()
+            ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+            ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+            ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+            ocdm_conjunctive_graph.add((URIRef(self.subject), URIRef('http://purl.org/dc/terms/title'), Literal('Bella zì'), URIRef('https://w3id.org/oc/meta/br/')))
+            ocdm_conjunctive_graph.generate_provenance(c_time=0, processes=processes)
+            serializations.append(ocdm_conjunctive_graph.provenance.serialize())
+        self.assertIn('Bella zì', serializations[0])
+        self.assertEqual(serializations[0], serializations[1])
+
+    def test_generate_provenance_sink(self):
+        prov_quads = []
+        tmp_dir = tempfile.mkdtemp()
+        for sink_class in (None, CallbackSink, NQuadsFileSink):
+            ocdm_conjunctive_graph = OCDMConjunctiveGraph()
+            ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+            ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+            ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+            if sink_class is None:
+                ocdm_conjunctive_graph.generate_provenance(c_time=0)
+                prov_quads.append({(s, p, o, URIRef(entity.prov_subject + '/prov/')) for entity in ocdm_conjunctive_graph.provenance.res_to_entity.values() for s, p, o in entity.g})
+            elif sink_class is CallbackSink:
+                streamed = []
+                ocdm_conjunctive_graph.generate_provenance(c_time=0, sink=CallbackSink(streamed.extend))
+                self.assertEqual(ocdm_conjunctive_graph.provenance.res_to_entity, dict())
+                prov_quads.append(set(streamed))
+            else:
+                file_path = os.path.join(tmp_dir, 'prov.nq')
+                with NQuadsFileSink(file_path) as sink:
+                    ocdm_conjunctive_graph.generate_provenance(c_time=0, sink=sink)
+                prov_graph = ConjunctiveGraph()
+                prov_graph.parse(file_path, format='nquads')
+                prov_quads.append({(s, p, o, c.identifier) for s, p, o, c in prov_graph.quads()})
+        shutil.rmtree(tmp_dir)
+        self.assertEqual(prov_quads[0], prov_quads[1])
+        self.assertEqual(prov_quads[0], prov_quads[2])
+
+    def test_generate_provenance_metrics(self):
+        metrics = Metrics()
+        ocdm_conjunctive_graph = OCDMConjunctiveGraph(metrics=metrics)
+        self.assertIsInstance(ocdm_conjunctive_graph.provenance.counter_handler, InstrumentedCounterHandler)
+        ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+        ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+        ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+        ocdm_conjunctive_graph.remove((URIRef(self.subject), URIRef('http://purl.org/dc/terms/title'), None))
+        ocdm_conjunctive_graph.generate_provenance(c_time=0)
+        phases = {dict(labels)['phase'] for name, labels in metrics.histograms if name == 'phase_seconds'}
+        self.assertEqual(phases, {'preexisting_finished', 'merge', 'plan', 'update_queries', 'mint', 'build'})
+        snapshots = {dict(labels)['kind']: value for (name, labels), value in metrics.counters.items() if name == 'snapshots_total'}
+        self.assertEqual(snapshots['merge'], 1)
+        self.assertGreater(snapshots['modification'], 0)
+        self.assertGreater(snapshots['creation'], 0)
+        prometheus = metrics.to_prometheus()
+        self.assertIn('# TYPE rdflib_ocdm_phase_seconds histogram', prometheus)
+        self.assertIn('rdflib_ocdm_phase_seconds_count{phase="mint"} 1', prometheus)
+        self.assertIn('rdflib_ocdm_snapshots_total{kind="merge"} 1', prometheus)
+        self.assertIn('rdflib_ocdm_counter_handler_seconds_bucket{operation="read_counters",le="+Inf"} 2', prometheus)
+        exported = json.loads(json.dumps(metrics.to_json()))
+        diff_statements = [histogram for histogram in exported['histograms'] if histogram['name'] == 'diff_statements']
+        self.assertEqual(diff_statements[0]['count'], snapshots['modification'] + snapshots['merge'])
+        list(ocdm_conjunctive_graph.provenance.get_update_queries())
+        diff_statements_count = [histogram['count'] for histogram in metrics.to_json()['histograms'] if histogram['name'] == 'diff_statements'][0]
+        self.assertEqual(diff_statements_count, diff_statements[0]['count'] + len(ocdm_conjunctive_graph.get_dirty_subjects()))
+        self.assertRaises(ValueError, metrics.write, os.path.join('test', 'metrics.txt'), 'xml')
+
+    def test_memory_estimate(self):
+        ocdm_conjunctive_graph = OCDMConjunctiveGraph(max_bytes_in_memory=2 ** 30)
+        ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+        ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+        ocdm_conjunctive_graph.remove((URIRef(self.subject), URIRef('http://purl.org/dc/terms/title'), None))
+        ocdm_conjunctive_graph.generate_provenance(c_time=0)
+        provenance = ocdm_conjunctive_graph.provenance
+        # The invalidated snapshot was already counted when it was created
+        self.assertIn(self.subject + '/prov/se/1', provenance.res_to_entity)
+        expected = sum(SNAPSHOT_BYTES + sum(sys.getsizeof(value) for value in (entity.record.update_query, entity.record.description) if value is not None) for entity in provenance.res_to_entity.values())
+        self.assertEqual(provenance._bytes_in_memory, expected)
+
+    def test_generate_provenance_spill(self):
+        prov_quads = []
+        for budget in (dict(), {'max_snapshots_in_memory': 1}, {'max_bytes_in_memory': 2048}):
+            metrics = Metrics()
+            ocdm_conjunctive_graph = OCDMConjunctiveGraph(metrics=metrics, **budget)
+            ocdm_conjunctive_graph.parse(os.path.join('test', 'br.nq'))
+            ocdm_conjunctive_graph.preexisting_finished(c_time=0)
+            ocdm_conjunctive_graph.merge(URIRef('https://w3id.org/oc/meta/id/0605'), URIRef('https://w3id.org/oc/meta/id/0636064270'))
+            ocdm_conjunctive_graph.remove((URIRef(self.subject), URIRef('http://purl.org/dc/terms/title'), None))
+            ocdm_conjunctive_graph.generate_provenance(c_time=0)
+            provenance = ocdm_conjunctive_graph.provenance
+            prov_quads.append(set(provenance.get_quads()))
+            if budget:
+                # The update queries are computed in chunks, each minted on its own
+                mint_count = [histogram['count'] for histogram in metrics.to_json()['histograms'] if histogram['name'] == 'phase_seconds' and histogram['labels'] == {'phase': 'mint'}]
+                self.assertGreater(mint_count[0], 1)
+                self.assertLessEqual(len(provenance.res_to_entity), budget.get('max_snapshots_in_memory', 2))
+                spool_path = provenance.spool.file_path
+                self.assertEqual({(s, p, o, c.identifier) for s, p, o, c in provenance.to_dataset().quads()}, prov_quads[0])
+                provenance.close()
+                self.assertFalse(os.path.exists(spool_path))
+        self.assertEqual(prov_quads[0], prov_quads[1])
+        self.assertEqual(prov_quads[0], prov_quads[2])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import unittest
+
+from rdflib import XSD, BNode, Graph, Literal, URIRef
+from rdflib.plugins.serializers.nquads import _nq_row
+
+from nt_writer import get_nq_row, get_nt_row
+from query_utils import DIFF_ISOMORPHIC, DIFF_SET, get_batched_update_queries, get_graph_diff, get_update_query
+
+
+class TestQueryUtils(unittest.TestCase):
+    def setUp(self):
+        self.subject = URIRef('https://w3id.org/oc/meta/br/0605')
+        self.title = URIRef('http://purl.org/dc/terms/title')
+
+    def test_get_graph_diff_set(self):
+        preexisting_graph = Graph()
+        preexisting_graph.add((self.subject, self.title, Literal('A')))
+        current_graph = Graph()
+        current_graph.add((self.subject, self.title, Literal('B')))
+        in_first, in_second, path = get_graph_diff(preexisting_graph, current_graph)
+        self.assertEqual(path, DIFF_SET)
+        self.assertEqual(set(in_first), {(self.subject, self.title, Literal('A'))})
+        self.assertEqual(set(in_second), {(self.subject, self.title, Literal('B'))})
+        self.assertEqual(get_update_query(preexisting_graph, current_graph)[0], 'DELETE DATA { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "A" . }; INSERT DATA { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "B" . }')
+
+    def test_get_graph_diff_isomorphic(self):
+        preexisting_graph = Graph()
+        preexisting_graph.add((self.subject, self.title, BNode()))
+        current_graph = Graph()
+        current_graph.add((self.subject, self.title, BNode()))
+        in_first, in_second, path = get_graph_diff(preexisting_graph, current_graph)
+        self.assertEqual(path, DIFF_ISOMORPHIC)
+        self.assertEqual(len(in_first), 0)
+        self.assertEqual(len(in_second), 0)
+        self.assertEqual(get_update_query(preexisting_graph, current_graph), ("", 0, 0))
+
+    def test_get_batched_update_queries(self):
+        graph_iri = URIRef('https://w3id.org/oc/meta/br/')
+        removed = [(self.subject, self.title, Literal('A'), graph_iri)]
+        added = [(self.subject, self.title, Literal(str(i)), graph_iri) for i in range(10)] + [(self.subject, self.title, Literal('B'), None)]
+        queries = list(get_batched_update_queries(removed, added, max_statements=4))
+        self.assertEqual(queries[0], 'DELETE DATA { GRAPH <https://w3id.org/oc/meta/br/> { <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "A" . } }')
+        self.assertEqual(len(queries), 4)
+        self.assertTrue(all(query.startswith('INSERT DATA { GRAPH <https://w3id.org/oc/meta/br/> {') for query in queries[1:]))
+        self.assertTrue(queries[-1].endswith('} <https://w3id.org/oc/meta/br/0605> <http://purl.org/dc/terms/title> "B" . }'))
+        queries = list(get_batched_update_queries(removed, added, max_bytes=300))
+        self.assertTrue(all(len(query.encode('utf8')) <= 300 for query in queries))
+        self.assertEqual(sum(query.count(' . ') for query in queries), len(removed) + len(added))
+
+
+    def test_nt_writer(self):
+        graph = Graph()
+        for o in (Literal('A'), Literal('"A"\\\n\r'), Literal('Bella zì', lang='it'), Literal(1), Literal('2020-12-07T21:17:39+00:00', datatype=XSD.dateTime), URIRef('http://a'), BNode('b')):
+            graph.add((self.subject, self.title, o))
+        self.assertEqual(''.join(get_nt_row(triple) for triple in graph), graph.serialize(format='nt11').replace('\n', ''))
+        graph_iri = URIRef('https://w3id.org/oc/meta/br/')
+        for triple in graph:
+            self.assertEqual(get_nq_row(triple + (graph_iri,)), _nq_row(triple, graph_iri))
+            self.assertEqual(get_nq_row(triple + (None,)), get_nt_row(triple) + '\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from uploader import SparqlUploader
+
+
+class StandInEndpoint(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        query = self.rfile.read(int(self.headers['Content-Length'])).decode('utf8')
+        with self.server.lock:
+            self.server.requests.append(query)
+            self.server.clients.add(self.client_address)
+            # Every request containing "flaky" fails the first time it is received
+            if 'flaky' in query and query not in self.server.failed:
+                self.server.failed.add(query)
+                status = 503
+            elif 'invalid' in query:
+                status = 400
+            else:
+                status = 204
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSparqlUploader(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInEndpoint)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.failed = set()
+        self.server.clients = set()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.endpoint = f'http://127.0.0.1:{self.server.server_address[1]}/sparql'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_upload(self):
+        queries = [f'DELETE DATA {{ <http://a> <http://b> "{i}" . }}' for i in range(10)]
+        queries += ['INSERT DATA { <http://a> <http://b> "flaky" . }', 'INSERT DATA { <http://a> <http://b> "invalid" . }']
+        queries += [f'INSERT DATA {{ <http://a> <http://b> "{i}" . }}' for i in range(10)]
+        reported = []
+        with SparqlUploader(self.endpoint, max_workers=4, backoff_factor=0.01) as uploader:
+            results = uploader.upload(iter(queries), callback=reported.append)
+        self.assertEqual([result.query for result in results], queries)
+        self.assertEqual(len(reported), len(queries))
+        self.assertEqual([result.index for result in results if not result.success], [11])
+        self.assertEqual(results[11].status, 400)
+        self.assertEqual(results[11].attempts, 1)
+        self.assertEqual(results[10].attempts, 2)
+        self.assertEqual(len(self.server.requests), len(queries) + 1)
+        # Every deletion reaches the endpoint before any insertion
+        self.assertTrue(all(query.startswith('DELETE') for query in self.server.requests[:10]))
+
+    def test_upload_reuses_connections(self):
+        queries = [f'INSERT DATA {{ <http://a> <http://b> "{i}" . }}' for i in range(20)]
+        with SparqlUploader(self.endpoint, max_workers=4) as uploader:
+            for _ in range(2):
+                self.assertTrue(all(result.success for result in uploader.upload(queries)))
+                self.assertLessEqual(len(uploader._connections), 4)
+        self.assertEqual(len(self.server.requests), 40)
+        self.assertLessEqual(len(self.server.clients), 4)
+
+    def test_unreachable_endpoint(self):
+        with socket.socket() as unused_socket:
+            unused_socket.bind(('127.0.0.1', 0))
+            endpoint = f'http://127.0.0.1:{unused_socket.getsockname()[1]}/sparql'
+        with SparqlUploader(endpoint, max_retries=2, backoff_factor=0.01, timeout=1) as uploader:
+            results = uploader.upload(['INSERT DATA { <http://a> <http://b> <http://c> . }'])
+        self.assertFalse(results[0].success)
+        self.assertEqual(results[0].attempts, 3)
+        self.assertIsNotNone(results[0].error)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright 2023 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS' AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from typing import Callable, Dict, Iterable, List, Optional
+
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlsplit
+
+
+class UploadResult(object):
+    """The outcome of sending one update request to the SPARQL endpoint."""
+
+    __slots__ = ('index', 'query', 'success', 'attempts', 'status', 'error')
+
+    def __init__(self, index: int, query: str, success: bool, attempts: int, status: Optional[int] = None, error: Optional[str] = None) -> None:
+        self.index: int = index
+        self.query: str = query
+        self.success: bool = success
+        self.attempts: int = attempts
+        self.status: Optional[int] = status
+        self.error: Optional[str] = error
+
+
+class SparqlUploader(object):
+    """It sends SPARQL update requests, e.g. the ones produced by ``get_batched_update_queries``,
+    to a SPARQL endpoint through a pool of persistent HTTP connections.
+
+    Requests are sent concurrently by up to ``max_workers`` threads, each holding its own
+    connection, which are kept across calls to ``upload`` until ``close`` is called. Since a ``DELETE DATA`` must not overtake an ``INSERT DATA`` that precedes it
+    (nor vice versa), consecutive requests of the same kind run concurrently, while the next
+    kind starts only when the previous ones are done. Failed requests are retried with an
+    exponential backoff when the failure may be transient, i.e. connection errors, timeouts,
+    429 and 5xx responses."""
+
+    retry_statuses = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, endpoint: str, max_workers: int = 4, max_retries: int = 3, backoff_factor: float = 0.5, timeout: float = 60.0, headers: Dict[str, str] = None) -> None:
+        """
+        Constructor of the ``SparqlUploader`` class.
+
+        :param endpoint: The URL of the SPARQL endpoint
+        :type endpoint: str
+        :param max_workers: The maximum number of requests in flight (defaults to 4)
+        :type max_workers: int, optional
+        :param max_retries: The number of times a request is retried after a transient failure (defaults to 3)
+        :type max_retries: int, optional
+        :param backoff_factor: The seconds waited before the first retry, doubled at every further retry (defaults to 0.5)
+        :type backoff_factor: float, optional
+        :param timeout: The timeout of each request in seconds (defaults to 60)
+        :type timeout: float, optional
+        :param headers: Additional HTTP headers, e.g. for authentication
+        :type headers: Dict[str, str], optional
+        """
+        url = urlsplit(endpoint)
+        if url.scheme not in {'http', 'https'} or not url.hostname:
+            raise ValueError(f"Invalid SPARQL endpoint: {endpoint}")
+        self.endpoint: str = endpoint
+        self.max_workers: int = max_workers
+        self.max_retries: int = max_retries
+        self.backoff_factor: float = backoff_factor
+        self.timeout: float = timeout
+        self.headers: Dict[str, str] = {'Content-Type': 'application/sparql-update; charset=utf-8'}
+        self.headers.update(headers or dict())
+        self._url = url
+        self._path: str = (url.path or '/') + (f'?{url.query}' if url.query else '')
+        self._local = threading.local()
+        self._connections: List[HTTPConnection] = []
+        self._lock = threading.Lock()
+        # The worker threads, and hence their keep-alive connections, are reused across uploads
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def upload(self, queries: Iterable[str], callback: Callable[[UploadResult], None] = None) -> List[UploadResult]:
+        """
+        It sends the update requests, consuming the iterable lazily: at most twice as many
+        requests as workers are pending at any time.
+
+        :param queries: The update requests
+        :type queries: Iterable[str]
+        :param callback: A function called with the result of each request as soon as it is known
+        :type callback: Callable[[UploadResult], None], optional
+        :return: The results, in the same order as the requests.
+        """
+        results: List[UploadResult] = []
+        pending: Dict[Future, int] = dict()
+        cur_operation: Optional[str] = None
+
+        def collect(return_when: str) -> None:
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                del pending[future]
+                result: UploadResult = future.result()
+                results.append(result)
+                if callback is not None:
+                    callback(result)
+
+        try:
+            for index, query in enumerate(queries):
+                operation = query.lstrip().split(' ', 1)[0].upper()
+                if pending and operation != cur_operation:
+                    collect(ALL_COMPLETED)
+                cur_operation = operation
+                pending[self._executor.submit(self._send, index, query)] = index
+                if len(pending) >= self.max_workers * 2:
+                    collect(FIRST_COMPLETED)
+        finally:
+            # Even if the requests cannot be produced anymore, those already submitted are completed
+            if pending:
+                collect(ALL_COMPLETED)
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def close(self) -> None:
+        """
+        It stops the worker threads and closes the connections of the pool.
+
+        :return: None
+        """
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    def __enter__(self) -> SparqlUploader:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _send(self, index: int, query: str) -> UploadResult:
+        attempts: int = 0
+        while True:
+            attempts += 1
+            status: Optional[int] = None
+            try:
+                status, reason = self._post(query)
+                if 200 <= status < 300:
+                    return UploadResult(index, query, True, attempts, status)
+                error = f"{status} {reason}"
+                retry = status in SparqlUploader.retry_statuses
+            except (OSError, HTTPException) as e:
+                self._reset_connection()
+                error = f"{type(e).__name__}: {e}"
+                retry = True
+            if not retry or attempts > self.max_retries:
+                return UploadResult(index, query, False, attempts, status, error)
+            time.sleep(self.backoff_factor * 2 ** (attempts - 1))
+
+    def _post(self, query: str) -> tuple:
+        connection = self._get_connection()
+        connection.request('POST', self._path, body=query.encode('utf8'), headers=self.headers)
+        response = connection.getresponse()
+        # The body is consumed so that the connection can be reused
+        response.read()
+        return response.status, response.reason
+
+    def _get_connection(self) -> HTTPConnection:
+        connection: Optional[HTTPConnection] = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection_class = HTTPSConnection if self._url.scheme == 'https' else HTTPConnection
+            connection = connection_class(self._url.hostname, self._url.port, timeout=self.timeout)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _reset_connection(self) -> None:
+        connection: Optional[HTTPConnection] = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()